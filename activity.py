@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from models import db, ActivityEvent
+
+# How long activity events are kept before prune_activity() removes them
+ACTIVITY_RETENTION_DAYS = 30
+
+# Page size limits for activity reads
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def log_activity(user_id, kind, message, timestamp=None):
+    """Append an activity event for a user.
+
+    The event is only added to the session; the caller commits it together
+    with whatever other changes it is making. `timestamp` defaults to now,
+    for callers that log events after the fact in a batch.
+    """
+    event = ActivityEvent(user_id=user_id, kind=kind, message=message, timestamp=timestamp or datetime.now())
+    db.session.add(event)
+    return event
+
+def get_activity_page(user_id, limit=DEFAULT_PAGE_SIZE, before=None, after=None):
+    """Return a page of a user's events, newest first.
+
+    `before` pages backwards into older events, `after` fetches events newer
+    than the given id. Without either, the most recent events are returned.
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    query = ActivityEvent.query.filter(ActivityEvent.user_id == user_id)
+
+    if after is not None:
+        # Oldest-first so a client catching up never skips a gap
+        events = (query.filter(ActivityEvent.id > after)
+                  .order_by(ActivityEvent.id.asc())
+                  .limit(limit + 1)
+                  .all())
+        has_more = len(events) > limit
+        events = list(reversed(events[:limit]))
+    else:
+        if before is not None:
+            query = query.filter(ActivityEvent.id < before)
+        events = query.order_by(ActivityEvent.id.desc()).limit(limit + 1).all()
+        has_more = len(events) > limit
+        events = events[:limit]
+
+    return events, has_more
+
+def format_activity(events):
+    """Render events as the newline separated log text the dashboard shows"""
+    return "\n".join(event.format() for event in events)
+
+def recent_activity_text(user_id, limit=DEFAULT_PAGE_SIZE):
+    events, _ = get_activity_page(user_id, limit)
+    return format_activity(events)
+
+def prune_activity(retention_days=ACTIVITY_RETENTION_DAYS):
+    """Delete events older than the retention window. Returns rows removed."""
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    deleted = (ActivityEvent.query
+               .filter(ActivityEvent.timestamp < cutoff)
+               .delete(synchronize_session=False))
+    db.session.commit()
+    return deleted
@@ -0,0 +1,204 @@
+"""
+Fleet-wide aggregates for the admin overview.
+
+Each figure comes from one grouped or paginated SQL query over the user
+table and the hourly stats rollups; no User objects are loaded, so the
+cost grows with the number of groups and the page size, not the fleet.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, or_
+from models import db, User, HourlyStats
+from tokens import REFRESH_MARGIN
+
+# Hours of rollups counted as recent failures
+FAILURE_WINDOW_HOURS = 24
+RECENT_FAILURES_LIMIT = 10
+
+# Page size limits for the user list
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+TOKEN_STATES = ('missing', 'unknown', 'expired', 'expiring', 'valid')
+
+def token_state(now):
+    """SQL expression classifying each user's Aveum token"""
+    return case(
+        (or_(User.aveum_token == None, User.aveum_token == ''), 'missing'),
+        (User.token_expires_at == None, 'unknown'),
+        (User.token_expires_at <= now, 'expired'),
+        (User.token_expires_at <= now + timedelta(seconds=REFRESH_MARGIN), 'expiring'),
+        else_='valid')
+
+def _recent_errors(since):
+    """Per-user error totals from the hourly rollups since `since`"""
+    errors = HourlyStats.mining_errors + HourlyStats.like_errors
+    return (db.session.query(HourlyStats.user_id.label('user_id'),
+                             func.sum(HourlyStats.mining_errors).label('mining_errors'),
+                             func.sum(HourlyStats.like_errors).label('like_errors'),
+                             func.sum(errors).label('errors'),
+                             func.max(HourlyStats.bucket_start).label('last_error_hour'))
+            .filter(HourlyStats.bucket_start >= since, errors > 0)
+            .group_by(HourlyStats.user_id)
+            .subquery())
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def fleet_summary(now=None):
+    """User counts by state plus fleet-wide totals, from a single GROUP BY"""
+    now = now or datetime.now()
+    token = token_state(now).label('token_state')
+    rows = (db.session.query(
+                User.mining_active, User.auto_like_active, User.is_mining, User.is_banned, token,
+                func.count(User.id),
+                func.sum(func.coalesce(User.mining_errors, 0)),
+                func.sum(func.coalesce(User.like_errors, 0)),
+                func.sum(func.coalesce(User.total_likes, 0)),
+                func.sum(func.coalesce(User.mining_sessions_completed, 0)),
+                func.min(User.last_ban_check_time),
+                func.sum(case((User.last_ban_check_time == None, 1), else_=0)))
+            .group_by(User.mining_active, User.auto_like_active, User.is_mining, User.is_banned, token)
+            .all())
+
+    summary = {
+        'users': 0,
+        'states': {'mining_active': 0, 'auto_like_active': 0, 'is_mining': 0, 'banned': 0, 'idle': 0},
+        'tokens': dict.fromkeys(TOKEN_STATES, 0),
+        'errors': {'mining_errors': 0, 'like_errors': 0},
+        'totals': {'total_likes': 0, 'mining_sessions_completed': 0},
+        'ban_checks': {'oldest': None, 'never': 0}
+    }
+    oldest_ban_check = None
+    for (mining_active, auto_like_active, is_mining, is_banned, token_name, count,
+         mining_errors, like_errors, total_likes, sessions, ban_check, never_checked) in rows:
+        summary['users'] += count
+        states = summary['states']
+        states['mining_active'] += count if mining_active else 0
+        states['auto_like_active'] += count if auto_like_active else 0
+        states['is_mining'] += count if is_mining else 0
+        states['banned'] += count if is_banned else 0
+        states['idle'] += count if not (mining_active or auto_like_active) else 0
+        summary['tokens'][token_name] += count
+        summary['errors']['mining_errors'] += mining_errors or 0
+        summary['errors']['like_errors'] += like_errors or 0
+        summary['totals']['total_likes'] += total_likes or 0
+        summary['totals']['mining_sessions_completed'] += sessions or 0
+        summary['ban_checks']['never'] += never_checked or 0
+        if ban_check and (oldest_ban_check is None or ban_check < oldest_ban_check):
+            oldest_ban_check = ban_check
+    summary['ban_checks']['oldest'] = _isoformat(oldest_ban_check)
+    return summary
+
+def recent_failures(now=None, window_hours=FAILURE_WINDOW_HOURS, limit=RECENT_FAILURES_LIMIT):
+    """Error totals for the window and the users with the most errors in it"""
+    now = now or datetime.now()
+    since = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=window_hours - 1)
+    recent = _recent_errors(since)
+    totals = db.session.query(func.count(recent.c.user_id), func.sum(recent.c.mining_errors),
+                              func.sum(recent.c.like_errors)).one()
+    rows = (db.session.query(recent, User.email)
+            .join(User, User.id == recent.c.user_id)
+            .order_by(recent.c.errors.desc(), recent.c.user_id)
+            .limit(limit)
+            .all())
+    return {
+        'window_hours': window_hours,
+        'since': since.isoformat(),
+        'users_with_errors': totals[0] or 0,
+        'mining_errors': totals[1] or 0,
+        'like_errors': totals[2] or 0,
+        'top_users': [{
+            'id': row.user_id,
+            'email': row.email,
+            'mining_errors': row.mining_errors,
+            'like_errors': row.like_errors,
+            'last_error_hour': _isoformat(row.last_error_hour)
+        } for row in rows]
+    }
+
+def users_page(sort='id', order='asc', page=1, per_page=DEFAULT_PAGE_SIZE, state=None, token=None, now=None):
+    """One sorted, filtered page of per-user state. Raises ValueError on bad arguments."""
+    now = now or datetime.now()
+    recent = _recent_errors(now.replace(minute=0, second=0, microsecond=0)
+                            - timedelta(hours=FAILURE_WINDOW_HOURS - 1))
+    recent_errors = func.coalesce(recent.c.errors, 0)
+    token_name = token_state(now)
+
+    sort_columns = {
+        'id': User.id,
+        'email': User.email,
+        'mining_errors': User.mining_errors,
+        'like_errors': User.like_errors,
+        'recent_errors': recent_errors,
+        'total_likes': User.total_likes,
+        'mining_sessions_completed': User.mining_sessions_completed,
+        'last_ban_check_time': User.last_ban_check_time,
+        'last_mining_time': User.last_mining_time,
+        'token_expires_at': User.token_expires_at
+    }
+    filters = {
+        'mining': User.mining_active == True,
+        'auto_like': User.auto_like_active == True,
+        'is_mining': User.is_mining == True,
+        'banned': User.is_banned == True,
+        'idle': or_(User.mining_active != True, User.mining_active == None)
+                & or_(User.auto_like_active != True, User.auto_like_active == None),
+        'failing': recent_errors > 0
+    }
+    if sort not in sort_columns:
+        raise ValueError(f"Unknown sort, use one of: {', '.join(sort_columns)}")
+    if order not in ('asc', 'desc'):
+        raise ValueError("Order must be asc or desc")
+    if state is not None and state not in filters:
+        raise ValueError(f"Unknown state, use one of: {', '.join(filters)}")
+    if token is not None and token not in TOKEN_STATES:
+        raise ValueError(f"Unknown token state, use one of: {', '.join(TOKEN_STATES)}")
+    page = max(1, int(page or 1))
+    per_page = max(1, min(int(per_page or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+    query = (db.session.query(
+                User.id, User.email, User.mining_active, User.auto_like_active, User.is_mining,
+                User.is_banned, token_name.label('token_state'), User.token_expires_at,
+                User.mining_errors, User.like_errors, recent_errors.label('recent_errors'),
+                User.total_likes, User.mining_sessions_completed,
+                User.last_ban_check_time, User.last_mining_time)
+             .outerjoin(recent, recent.c.user_id == User.id))
+    if state is not None:
+        query = query.filter(filters[state])
+    if token is not None:
+        query = query.filter(token_name == token)
+
+    total = query.order_by(None).count()
+    # NULLs (e.g. never checked, no token) sort as the lowest value in
+    # either direction. A null-flag key leads the ordering because MySQL
+    # has no NULLS FIRST/LAST.
+    column = sort_columns[sort]
+    has_value = case((column == None, 0), else_=1)
+    ordering = (has_value.asc(), column.asc()) if order == 'asc' else (has_value.desc(), column.desc())
+    rows = query.order_by(*ordering, User.id).offset((page - 1) * per_page).limit(per_page).all()
+
+    return {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'sort': sort,
+        'order': order,
+        'users': [{
+            'id': row.id,
+            'email': row.email,
+            'mining_active': bool(row.mining_active),
+            'auto_like_active': bool(row.auto_like_active),
+            'is_mining': bool(row.is_mining),
+            'is_banned': bool(row.is_banned),
+            'token_state': row.token_state,
+            'token_expires_at': _isoformat(row.token_expires_at),
+            'mining_errors': row.mining_errors or 0,
+            'like_errors': row.like_errors or 0,
+            'recent_errors': row.recent_errors,
+            'total_likes': row.total_likes or 0,
+            'mining_sessions_completed': row.mining_sessions_completed or 0,
+            'last_ban_check_time': _isoformat(row.last_ban_check_time),
+            'last_mining_time': _isoformat(row.last_mining_time)
+        } for row in rows]
+    }
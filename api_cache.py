@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import threading
+import concurrent.futures
+from cache_backends import MemoryCache
+import json_codec
+
+# Seconds a successful upstream read stays fresh, per API endpoint
+DEFAULT_TTLS = {
+    'hubStatus': 10,
+    'profile': 60,
+    'checkBan': 60
+}
+
+def cache_key(endpoint, token):
+    # Hash the token so a shared backend never holds usable credentials
+    return f"read:{endpoint}:{hashlib.sha256(token.encode()).hexdigest()[:32]}"
+
+class ReadCache:
+    """Per-token TTL cache with single-flight coalescing for upstream reads.
+
+    Concurrent reads of the same (endpoint, token) on one event loop share a
+    single in-flight request. Only successful, non-error responses are
+    cached, in `backend`: the in-process LRU by default, or a shared
+    backend so every worker process sees the same entries. Writes call
+    invalidate() so the next read goes upstream again. Another process
+    may still store a read that started before the write, for at most
+    its TTL.
+
+    Shared backends do network or disk I/O, so their calls never run on
+    the event loop: lookups go to the loop's default executor, and stores
+    and deletes to one writer thread, so an invalidation always lands
+    after any store queued before it.
+    """
+
+    def __init__(self, ttls=None, backend=None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.backend = backend if backend is not None else MemoryCache()
+        self._writer = (concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='read-cache')
+                        if self.backend.shared else None)
+        self._inflight = {}
+        # Per-token invalidation counters, only kept while a fetch for the
+        # token is pending, so rotated tokens do not pile up
+        self._generations = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _store(self, key, generation, task):
+        loop = task.get_loop()
+        with self._lock:
+            if self._inflight.get((loop, key)) is task:
+                del self._inflight[(loop, key)]
+            current = self._generations.get(key[1], 0)
+            self._pending[key[1]] -= 1
+            if not self._pending[key[1]]:
+                del self._pending[key[1]]
+                self._generations.pop(key[1], None)
+            if task.cancelled() or task.exception() is not None:
+                return
+            result = task.result()
+            if not result.ok:
+                return
+            # Drop results that raced with an invalidation of this token
+            if current != generation:
+                return
+        if self.backend.shared:
+            self._writer.submit(self.backend.set, cache_key(*key),
+                                json_codec.dumps(result.to_dict()), self.ttls[key[0]])
+        else:
+            self.backend.set(cache_key(*key), result, self.ttls[key[0]])
+
+    async def _lookup(self, key, result_class):
+        if not self.backend.shared:
+            return self.backend.get(cache_key(*key))
+        loop = asyncio.get_running_loop()
+        value = await loop.run_in_executor(None, self.backend.get, cache_key(*key))
+        return None if value is None else result_class.from_dict(json_codec.loads(value))
+
+    async def get_or_fetch(self, endpoint, token, fetch, result_class=None):
+        """Return a cached result for (endpoint, token) or call fetch() once.
+
+        `result_class` rebuilds results read back from a shared backend.
+        """
+        if endpoint not in self.ttls:
+            return await fetch()
+
+        key = (endpoint, token)
+        cached = await self._lookup(key, result_class)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._inflight.get((loop, key))
+            if task is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                generation = self._generations.get(token, 0)
+                task = loop.create_task(fetch())
+                self._inflight[(loop, key)] = task
+                self._pending[token] = self._pending.get(token, 0) + 1
+                task.add_done_callback(lambda t: self._store(key, generation, t))
+
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def invalidate(self, token, endpoints=None):
+        """Forget cached reads for a token (all endpoints unless given)"""
+        endpoints = endpoints or list(self.ttls)
+        with self._lock:
+            if token in self._pending:
+                self._generations[token] = self._generations.get(token, 0) + 1
+            for endpoint in endpoints:
+                for inflight_key in [k for k in self._inflight if k[1] == (endpoint, token)]:
+                    del self._inflight[inflight_key]
+        keys = [cache_key(endpoint, token) for endpoint in endpoints]
+        if self.backend.shared:
+            await asyncio.wrap_future(self._writer.submit(self.backend.delete, *keys))
+        else:
+            self.backend.delete(*keys)
+
+    def clear(self):
+        with self._lock:
+            self._inflight.clear()
+            for token in self._pending:
+                self._generations[token] = self._generations.get(token, 0) + 1
+        self.backend.clear()
+
+    def stats(self, count_entries=True):
+        """Lookup counts and backend figures. count_entries=False skips
+        asking a shared backend for its size, which is a blocking query."""
+        if count_entries or not self.backend.shared:
+            backend = self.backend.stats()
+        else:
+            backend = {'backend': self.backend.name, 'entries': None, 'errors': self.backend.errors}
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                'backend': backend['backend'],
+                'entries': backend['entries'],
+                'backend_errors': backend['errors']
+            }
@@ -0,0 +1,170 @@
+"""
+Typed results for Aveum API calls.
+
+Each class reads only the fields the app uses from the upstream JSON and
+keeps them in __slots__, so a call result is one small object rather than
+the whole decoded payload. `success` means the request completed with a
+non-error HTTP status; `status` keeps the HTTP status of failed replies too.
+`retryable` marks failures worth trying again later (timeouts, connection
+errors, an open circuit, 429 and 5xx) as opposed to fatal ones.
+"""
+
+def is_retryable_status(status):
+    return status == 429 or status >= 500
+
+def _error_message(data, default):
+    """The upstream's error text, which is either a string or {'error': ...}"""
+    error = data.get('message', default) if isinstance(data, dict) else default
+    if isinstance(error, dict):
+        error = error.get('error', default)
+    return error or default
+
+def _float(value, default=None):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+class ApiResult:
+    __slots__ = ('success', 'status', 'error', 'retryable')
+
+    def __init__(self, success=True, status=None, error=None, retryable=False):
+        self.success = success
+        self.status = status
+        self.error = error
+        self.retryable = retryable
+
+    @classmethod
+    def from_response(cls, status, data):
+        if status >= 400:
+            # Error replies (including 5xx pages that were not JSON) never count as answers
+            return cls.failure(_error_message(data, f"HTTP {status}"), status,
+                               retryable=is_retryable_status(status))
+        result = cls(True, status)
+        result.parse(data if isinstance(data, dict) else {})
+        return result
+
+    @classmethod
+    def failure(cls, error, status=None, retryable=False):
+        return cls(False, status, error, retryable)
+
+    def parse(self, data):
+        """Copy the fields this result type uses out of the decoded JSON"""
+
+    @property
+    def ok(self):
+        """Completed with a non-error HTTP status"""
+        return self.success and (self.status or 200) < 400
+
+    def to_dict(self):
+        """Plain fields for storing the result in a shared cache"""
+        return {name: getattr(self, name) for name in self._fields()}
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(data['success'], data['status'], data['error'], data['retryable'])
+        for name in cls._fields():
+            if name in data:
+                setattr(result, name, data[name])
+        return result
+
+    def error_message(self, default='Unknown error'):
+        return self.error or default
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def _fields(cls):
+        for klass in reversed(cls.__mro__):
+            yield from getattr(klass, '__slots__', ())
+
+class LoginResult(ApiResult):
+    __slots__ = ('token', 'device_id', 'device_model', 'platform_version')
+
+    def __init__(self, success=True, status=None, error=None, retryable=False):
+        super().__init__(success, status, error, retryable)
+        self.token = None
+        self.device_id = None
+        self.device_model = None
+        self.platform_version = None
+
+    @classmethod
+    def from_login(cls, status, data, payload):
+        """Build the result of a login, which only succeeds with a token"""
+        data = data if isinstance(data, dict) else {}
+        if 'token' not in data:
+            return cls.failure(_error_message(data, 'Login failed'), status,
+                               retryable=is_retryable_status(status))
+        result = cls(True, status)
+        result.token = data['token']
+        result.device_id = payload['device_id']
+        result.device_model = payload['device_model']
+        result.platform_version = payload['platform_version']
+        return result
+
+class HubStatus(ApiResult):
+    __slots__ = ('is_hub', 'current_earning', 'remaining_time')
+
+    def __init__(self, success=True, status=None, error=None, retryable=False):
+        super().__init__(success, status, error, retryable)
+        self.is_hub = False
+        self.current_earning = None
+        self.remaining_time = 0.0
+
+    def parse(self, data):
+        self.is_hub = bool(data.get('isHub'))
+        self.current_earning = _float(data.get('currentEarning'))
+        self.remaining_time = _float(data.get('remainingTime'), 0.0)
+
+class BanStatus(ApiResult):
+    __slots__ = ('banned',)
+
+    def __init__(self, success=True, status=None, error=None, retryable=False):
+        super().__init__(success, status, error, retryable)
+        self.banned = False
+
+    def parse(self, data):
+        self.banned = bool(data.get('banned', False))
+
+class Profile(ApiResult):
+    __slots__ = ('data',)
+
+    def __init__(self, success=True, status=None, error=None, retryable=False):
+        super().__init__(success, status, error, retryable)
+        self.data = {}
+
+    def parse(self, data):
+        # Nothing in the app reads profile fields yet, so keep them as sent
+        self.data = data
+
+class FeedUser:
+    __slots__ = ('id', 'username', 'is_liked')
+
+    def __init__(self, id, username=None, is_liked=False):
+        self.id = id
+        self.username = username
+        self.is_liked = is_liked
+
+    def __repr__(self):
+        return f"FeedUser(id={self.id!r}, username={self.username!r}, is_liked={self.is_liked!r})"
+
+class FeedPage(ApiResult):
+    __slots__ = ('users',)
+
+    def __init__(self, success=True, status=None, error=None, retryable=False):
+        super().__init__(success, status, error, retryable)
+        self.users = ()
+
+    def parse(self, data):
+        # The feed lists either users or posts depending on the endpoint
+        users = data.get('users')
+        if isinstance(users, list):
+            self.users = tuple(FeedUser(u.get('id'), u.get('username'), bool(u.get('is_liked')))
+                               for u in users if isinstance(u, dict))
+            return
+        posts = data.get('posts')
+        if isinstance(posts, list):
+            self.users = tuple(FeedUser(p.get('user_id') or p.get('id'), p.get('username'), bool(p.get('liked')))
+                               for p in posts if isinstance(p, dict))
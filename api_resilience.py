@@ -0,0 +1,93 @@
+import time
+import random
+import threading
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is known to be down"""
+
+class CircuitBreaker:
+    """Fails calls fast after repeated upstream failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() returns False for `reset_timeout` seconds. Then a single probe
+    call is let through: success closes the circuit, failure opens it
+    again for another `reset_timeout`.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # Let one probe through per reset_timeout, also when an earlier
+            # probe never reported back (e.g. it was cancelled)
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"Aveum API circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {'state': self.state, 'failures': self.failures, 'times_opened': self.times_opened}
+
+class RetryBudget:
+    """Caps retries to a fraction of recent requests.
+
+    Every request deposits `ratio` tokens and every retry spends one, so
+    while the upstream struggles retries add at most `ratio` extra load
+    instead of multiplying it. `min_tokens` allows a few retries when
+    traffic is light.
+    """
+
+    def __init__(self, ratio=0.2, min_tokens=10, max_tokens=100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = float(min_tokens)
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                self.exhausted += 1
+                return False
+            self.tokens -= 1
+            self.retries += 1
+            return True
+
+def backoff_delay(attempt, base=0.25, cap=2.0):
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,428 @@
+from flask import Blueprint, current_app, request, Response, stream_with_context, abort
+from flask_login import login_required, current_user
+from datetime import datetime
+import time
+import aveum_api
+from models import db, User, ActivityEvent
+from event_loop import run_async
+from events import broker
+from activity import log_activity, get_activity_page, format_activity
+from jobs import token_manager, load_env_credentials
+from config import get_settings
+from auth import admin_required
+from cache_backends import shared_cache, get_or_build
+import admin
+import metrics
+import stats
+import json_codec
+from json_codec import jsonify
+
+api_views = Blueprint('api_views', __name__)
+
+# Server-Sent Events tuning: how often a stream re-checks the database when
+# nothing local woke it, how long one stream lives before the browser
+# reconnects, and the reconnect delay sent to the browser
+SSE_POLL_INTERVAL = 15
+SSE_MAX_DURATION = 300
+SSE_RETRY_MS = 3000
+
+# Seconds a built status payload is reused; its key changes with the user's state
+STATUS_CACHE_TTL = 60
+
+# Bearer token required to scrape /metrics; unset leaves it open
+METRICS_TOKEN = get_settings().get('METRICS_TOKEN')
+
+@api_views.route('/api/test_credentials', methods=['POST'])
+@login_required
+def test_credentials():
+    data = request.get_json()
+    email = data.get('email')
+    password = data.get('password')
+    
+    if not email or not password:
+        return jsonify({'success': False, 'message': 'Email and password are required'})
+    
+    try:
+        result = run_async(aveum_api.login(email, password))
+        if result.success:
+            return jsonify({'success': True, 'message': 'Credentials are valid'})
+        else:
+            return jsonify({'success': False, 'message': result.error_message('Invalid credentials')})
+    except Exception as e:
+        current_app.logger.error(f"Error testing credentials: {str(e)}")
+        return jsonify({'success': False, 'message': f'Error testing credentials: {str(e)}'})
+
+@api_views.route('/api/start-mining', methods=['POST'])
+@login_required
+def start_mining():
+    if current_user.is_mining:
+        return jsonify({'error': 'Mining is already in progress'}), 400
+    
+    # The worker service picks the flag up and runs the mining job
+    current_user.is_mining = True
+    db.session.commit()
+    
+    return jsonify({'message': 'Mining started successfully'})
+
+@api_views.route('/api/stop-mining', methods=['POST'])
+@login_required
+def stop_mining():
+    if not current_user.is_mining:
+        return jsonify({'error': 'Mining is not in progress'}), 400
+    
+    current_user.is_mining = False
+    db.session.commit()
+    
+    return jsonify({'message': 'Mining stopped successfully'})
+
+@api_views.route('/api/toggle_auto_like', methods=['POST'])
+@login_required
+def toggle_auto_like():
+    # Try to use existing token first
+    if current_user.aveum_token:
+        current_user.auto_like_active = not current_user.auto_like_active
+        action = "started" if current_user.auto_like_active else "stopped"
+        log_activity(current_user.id, 'auto_like', f"Auto-like {action}.")
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'auto_like_active': current_user.auto_like_active,
+            'message': f"Auto-like {action} successfully"
+        })
+    
+    # If no token, try to login with .env credentials
+    env_credentials = load_env_credentials()
+    if not env_credentials['email'] or not env_credentials['password']:
+        return jsonify({'success': False, 'error': 'Please set your Aveum credentials in Settings'}), 400
+    
+    # Try to login
+    login_result = run_async(aveum_api.login(env_credentials['email'], env_credentials['password']))
+    if not login_result.success:
+        return jsonify({'success': False, 'error': f"Login failed: {login_result.error_message()}"}), 500
+    
+    # Update user token and device info
+    token_manager.record(current_user, login_result)
+    
+    # Toggle auto-like
+    current_user.auto_like_active = not current_user.auto_like_active
+    action = "started" if current_user.auto_like_active else "stopped"
+    log_activity(current_user.id, 'auto_like', f"Auto-like {action} after login.")
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'auto_like_active': current_user.auto_like_active,
+        'message': f"Auto-like {action} successfully after login"
+    })
+
+@api_views.route('/api/refresh_token', methods=['POST'])
+@login_required
+def refresh_token():
+    if not current_user.aveum_email or not current_user.aveum_password:
+        return jsonify({'error': 'Please set your Aveum credentials first'}), 400
+    
+    # Login to Aveum to get a new token
+    login_result = run_async(aveum_api.login(current_user.aveum_email, current_user.aveum_password))
+    
+    if login_result.success:
+        token_manager.record(current_user, login_result)
+        
+        # Update activity log
+        log_activity(current_user.id, 'token', f"Token refreshed. New device: {current_user.device_model} (ID: {current_user.device_id})")
+        
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Token refreshed successfully'})
+    else:
+        return jsonify({'success': False, 'error': f"Token refresh failed: {login_result.error_message()}"}), 500
+
+def build_status(user):
+    """Dashboard status fields that come from our own database"""
+    today = stats.today(user.id)
+    return {
+        'aveum_email': user.aveum_email or "Not set",
+        'login_status': bool(user.aveum_token),
+        'device_id': user.device_id or "Not set",
+        'device_model': user.device_model or "Not set",
+        'platform_version': user.platform_version or "Not set",
+        'mining_active': user.mining_active,
+        'is_mining': user.is_mining,
+        'current_balance': float(user.balance or 0),
+        'total_rewards': float(user.total_rewards or 0),
+        'mining_sessions_completed': user.mining_sessions_completed or 0,
+        'mining_errors': user.mining_errors or 0,
+        'auto_like_active': user.auto_like_active,
+        'total_likes': user.total_likes or 0,
+        'daily_likes': today.likes if today else 0,
+        'daily_rewards': today.rewards if today else 0.0,
+        'daily_earnings': today.earnings if today else 0.0,
+        'like_errors': user.like_errors or 0,
+        'is_banned': user.is_banned,
+        'last_ban_check_time': user.last_ban_check_time.strftime('%Y-%m-%d %H:%M:%S') if user.last_ban_check_time else 'Never'
+    }
+
+def latest_activity_id(user_id):
+    newest = (ActivityEvent.query.with_entities(ActivityEvent.id)
+              .filter_by(user_id=user_id)
+              .order_by(ActivityEvent.id.desc())
+              .first())
+    return newest[0] if newest else 0
+
+def conditional_json(etag, build_payload):
+    """Answer 304 when the client already has `etag`, else jsonify the payload.
+
+    `build_payload` is only called when a body is actually needed, so an
+    unchanged poll skips both the queries behind it and serialization.
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    # Let the browser keep the body but revalidate it on every poll
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@api_views.route('/api/status', methods=['GET'])
+@login_required
+def get_status():
+    if not current_user.aveum_token:
+        return jsonify({'error': 'Not logged in to Aveum'}), 400
+    
+    # Get hub status from Aveum
+    hub_status = run_async(aveum_api.get_hub_status(current_user.aveum_token))
+    
+    if hub_status.ok:
+        # Update user stats if mining is active
+        if hub_status.is_hub and current_user.mining_active:
+            if hub_status.current_earning is not None:
+                current_user.total_rewards = hub_status.current_earning
+                current_user.balance = hub_status.current_earning  # Update current balance
+                db.session.commit()
+        
+        def build_payload():
+            status = build_status(current_user)
+            status['success'] = True
+            events, _ = get_activity_page(current_user.id)
+            status['last_activity'] = format_activity(events) or "No activity recorded"
+            status['last_activity_id'] = events[0].id if events else 0
+            return status
+        
+        # The date is part of the tag because the daily figures reset at midnight
+        etag = f"s{current_user.state_revision}-{latest_activity_id(current_user.id)}-{stats.day_start():%Y%m%d}"
+        # Keyed by the ETag, so every worker can reuse a payload until the state changes
+        key = f"status:{current_user.id}:{etag}"
+        return conditional_json(etag, lambda: get_or_build(shared_cache, key, STATUS_CACHE_TTL, build_payload))
+    else:
+        return jsonify({'success': False, 'error': f"Failed to get status: {hub_status.error_message()}"}), 500
+
+@api_views.route('/api/get_activity_log', methods=['GET'])
+@login_required
+def get_activity_log():
+    try:
+        limit = request.args.get('limit', type=int)
+        before = request.args.get('before', type=int)
+        # `since` is the polling spelling of `after`: only entries newer than it
+        after = request.args.get('after', type=int)
+        if after is None:
+            after = request.args.get('since', type=int)
+        newest_id = latest_activity_id(current_user.id)
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 500
+    
+    def build_payload():
+        events, has_more = get_activity_page(current_user.id, limit, before=before, after=after)
+        return {
+            'status': 'success',
+            'activity_log': format_activity(events) or "No activity recorded yet.",
+            'events': [event.to_dict() for event in events],
+            'has_more': has_more,
+            # Cursors for the next older page and for polling newer entries
+            'before': events[-1].id if events else before,
+            'after': events[0].id if events else after,
+            'since': events[0].id if events else (after if after is not None else newest_id)
+        }
+    
+    etag = f"a{newest_id}-{limit}-{before}-{after}"
+    return conditional_json(etag, build_payload)
+
+@api_views.route('/api/stats/history', methods=['GET'])
+@login_required
+def get_stats_history():
+    range_name = request.args.get('range', stats.DEFAULT_RANGE)
+    if range_name not in stats.RANGES:
+        return jsonify({'success': False, 'error': f"Unknown range, use one of: {', '.join(stats.RANGES)}"}), 400
+    
+    # Rollups only change with state_revision, and the window moves every hour
+    etag = f"h{current_user.state_revision}-{range_name}-{stats.hour_start():%Y%m%d%H}"
+    return conditional_json(etag, lambda: dict(stats.history(current_user.id, range_name), success=True))
+
+@api_views.route('/api/admin/overview', methods=['GET'])
+@admin_required
+def admin_overview():
+    try:
+        users = admin.users_page(
+            sort=request.args.get('sort', 'id'),
+            order=request.args.get('order', 'asc'),
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', admin.DEFAULT_PAGE_SIZE, type=int),
+            state=request.args.get('state'),
+            token=request.args.get('token'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = jsonify({
+        'success': True,
+        'summary': admin.fleet_summary(),
+        'recent_failures': admin.recent_failures(),
+        'users': users
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def sse_message(event, data, event_id=None):
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json_codec.dumps(data)}\n\n"
+
+@api_views.route('/api/events')
+@login_required
+def stream_events():
+    """Server-Sent Events stream of status deltas and new activity entries"""
+    user_id = current_user.id
+    # Resume after the last activity entry the browser saw, if reconnecting
+    after = request.headers.get('Last-Event-ID', type=int)
+    if after is None:
+        after = request.args.get('after', type=int)
+    
+    def generate():
+        nonlocal after
+        listener = broker.subscribe(user_id)
+        last_status = {}
+        started = time.monotonic()
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while time.monotonic() - started < SSE_MAX_DURATION:
+                listener.clear()
+                # End the read transaction so we see other sessions' commits
+                db.session.rollback()
+                
+                user = User.query.get(user_id)
+                if user is None:
+                    return
+                status = build_status(user)
+                delta = {key: value for key, value in status.items() if last_status.get(key) != value}
+                if delta:
+                    yield sse_message('status', delta)
+                    last_status = status
+                
+                if after is None:
+                    # First connection: the page already loaded recent entries
+                    after = latest_activity_id(user_id)
+                else:
+                    events, has_more = get_activity_page(user_id, after=after)
+                    for activity in reversed(events):
+                        yield sse_message('activity', activity.to_dict(), activity.id)
+                        after = activity.id
+                    if has_more:
+                        continue
+                
+                # Hand the connection back to the pool while idle
+                db.session.rollback()
+                # Wake on local changes; the timeout catches other processes
+                if not listener.wait(SSE_POLL_INTERVAL):
+                    yield ": keepalive\n\n"
+        finally:
+            broker.unsubscribe(user_id, listener)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@api_views.route('/api/mining-status')
+@login_required
+def get_mining_status():
+    try:
+        return conditional_json(f"m{current_user.state_revision}", lambda: {
+            'is_mining': current_user.is_mining,
+            'current_balance': float(current_user.balance or 0),
+            'total_rewards': float(current_user.total_rewards or 0)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_views.route('/api/check-ban', methods=['POST'])
+@login_required
+def check_ban():
+    if not current_user.aveum_token:
+        return jsonify({'success': False, 'error': 'Not logged in to Aveum'}), 400
+    
+    try:
+        # Check ban status
+        ban_result = run_async(aveum_api.check_user_ban(current_user.aveum_token))
+        
+        if ban_result.ok:
+            is_banned = ban_result.banned
+            
+            # Update user ban status
+            current_user.is_banned = is_banned
+            current_user.last_ban_check_time = datetime.now()
+            
+            # Add to activity log
+            ban_status = "Banned" if is_banned else "Not banned"
+            log_activity(current_user.id, 'ban_check', f"Ban check: {ban_status}")
+            
+            db.session.commit()
+            
+            return jsonify({
+                'success': True,
+                'is_banned': is_banned,
+                'message': f"Account is {ban_status}"
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': f"Failed to check ban status: {ban_result.error_message()}"
+            }), 500
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_views.route('/api/switch-mode', methods=['POST'])
+@login_required
+def switch_mode():
+    if not current_user.aveum_token:
+        return jsonify({'success': False, 'error': 'Not logged in to Aveum'}), 400
+    
+    try:
+        # Toggle between mining and auto-like modes
+        if current_user.mining_active:
+            # Switch from mining to auto-like
+            current_user.mining_active = False
+            current_user.auto_like_active = True
+            mode = "Auto-like"
+        else:
+            # Switch from auto-like to mining
+            current_user.mining_active = True
+            current_user.auto_like_active = False
+            mode = "Mining"
+        
+        # Add to activity log
+        log_activity(current_user.id, 'mode', f"Switched to {mode} mode")
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f"Switched to {mode} mode successfully"
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_views.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text format metrics for this process"""
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        abort(401)
+    return Response(metrics.registry.expose(), headers={'Content-Type': metrics.CONTENT_TYPE})
@@ -0,0 +1,94 @@
+import os
+import gzip
+import hashlib
+import mimetypes
+from flask import Response, current_app, request, url_for, abort
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Hashed URLs never change content, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Only text formats are worth compressing
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+class Asset:
+    def __init__(self, filename, content):
+        self.filename = filename
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        root, ext = os.path.splitext(filename)
+        self.hashed_name = f"{root}.{self.digest}{ext}"
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.variants = {'identity': content}
+
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                self.variants['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=11)
+                if len(compressed) < len(content):
+                    self.variants['br'] = compressed
+
+    def pick_encoding(self, accept_encodings):
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+class AssetManifest:
+    """Content-hashed URLs for static files, built once at startup.
+
+    Files under the static folder are read, fingerprinted and compressed
+    in memory. asset_url() in templates returns /assets/<name>.<hash>.<ext>.
+    Those URLs are served with immutable caching and the best
+    precompressed variant the browser accepts. In debug mode the plain
+    static URLs are used so edits show up without a restart.
+    """
+
+    def __init__(self, app=None):
+        self.assets = {}
+        self.by_hashed_name = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.build(app.static_folder)
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url
+
+    def build(self, static_folder):
+        self.assets = {}
+        for directory, _, files in os.walk(static_folder):
+            for name in files:
+                path = os.path.join(directory, name)
+                filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    self.assets[filename] = Asset(filename, f.read())
+        self.by_hashed_name = {asset.hashed_name: asset for asset in self.assets.values()}
+
+    def url(self, filename):
+        asset = self.assets.get(filename)
+        # Checked per call: app.run(debug=True) sets it after init_app()
+        if current_app.debug or asset is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=asset.hashed_name)
+
+    def serve(self, filename):
+        asset = self.by_hashed_name.get(filename)
+        if asset is None:
+            abort(404)
+
+        encoding = asset.pick_encoding(request.accept_encodings)
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.set_etag(f"{asset.digest}-{encoding}")
+        return response.make_conditional(request)
+
+assets = AssetManifest()
@@ -0,0 +1,102 @@
+import time
+import threading
+from functools import wraps
+from json_codec import jsonify
+from flask_login import LoginManager, UserMixin, current_user
+from models import db, User
+from config import get_settings
+
+# Seconds a user id is trusted to exist without checking the database
+IDENTITY_TTL = 30
+
+# Comma separated emails of accounts allowed to use the admin endpoints.
+# Deliberately separate from ADMIN_EMAIL, the seeded default login, which
+# must not get admin access unless it is listed here; unset means no admins.
+ADMIN_EMAILS = {email.strip().lower() for email in
+                get_settings().get('ADMIN_EMAILS', '').split(',') if email.strip()}
+
+class UserPrincipal(UserMixin):
+    """Lightweight stand-in for the logged-in user.
+
+    Knowing the id is enough for login_required and for routes that only
+    scope queries by user, so the User row is loaded on first attribute
+    access instead of on every request. Reads and writes of any other
+    attribute go to that row.
+    """
+
+    def __init__(self, user_id):
+        object.__setattr__(self, 'id', user_id)
+        object.__setattr__(self, '_user', None)
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def user(self):
+        """The full User row, loaded into the current session on first use"""
+        user = object.__getattribute__(self, '_user')
+        if user is None:
+            user = User.query.get(self.id)
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def __getattr__(self, name):
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.user, name, value)
+
+class IdentityCache:
+    """Per-process record of recently verified user ids"""
+
+    def __init__(self, ttl=IDENTITY_TTL):
+        self.ttl = ttl
+        self._verified = {}
+        self._lock = threading.Lock()
+
+    def exists(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._verified.get(user_id)
+        if expires_at is not None and expires_at > now:
+            return True
+
+        found = db.session.query(User.id).filter_by(id=user_id).scalar() is not None
+        with self._lock:
+            if found:
+                self._verified[user_id] = now + self.ttl
+            else:
+                self._verified.pop(user_id, None)
+        return found
+
+    def forget(self, user_id):
+        with self._lock:
+            self._verified.pop(user_id, None)
+
+identity_cache = IdentityCache()
+
+def load_principal(user_id):
+    """Flask-Login user loader returning a UserPrincipal without loading the row"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return UserPrincipal(user_id) if identity_cache.exists(user_id) else None
+
+login_manager = LoginManager()
+login_manager.login_view = 'views.login'
+login_manager.user_loader(load_principal)
+
+def is_admin(user):
+    return bool(user and user.is_authenticated and (user.email or '').lower() in ADMIN_EMAILS)
+
+def admin_required(view):
+    """Like login_required, but also answers 403 to non-admin users"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if not is_admin(current_user):
+            return jsonify({'success': False, 'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapped
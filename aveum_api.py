@@ -1,12 +1,20 @@
-import os
 import random
 import secrets
 import aiohttp
 import asyncio
+import time
 from datetime import datetime
+from api_cache import ReadCache
+from cache_backends import shared_cache
+from api_models import ApiResult, LoginResult, HubStatus, BanStatus, Profile, FeedPage, is_retryable_status
+from api_resilience import CircuitBreaker, CircuitOpenError, RetryBudget, backoff_delay
+from config import get_settings
+import json_codec
+import metrics
 
 # Constants
-API_BASE_URL = 'https://api.aveum.io'
+# Point AVEUM_API_BASE_URL at another server (e.g. fake_aveum_server.py) for testing
+API_BASE_URL = get_settings().get('AVEUM_API_BASE_URL', 'https://api.aveum.io')
 API_ENDPOINTS = {
     'login': '/users/login',
     'startHub': '/users/start-hub',
@@ -74,203 +82,287 @@ def get_login_payload(email, password):
         'ip_address': "180.249.164.195"
     }
 
+# Connection pool settings, overridable from the environment
+CONNECTION_LIMIT = int(get_settings().get('AVEUM_CONNECTION_LIMIT', '100'))
+CONNECTION_LIMIT_PER_HOST = int(get_settings().get('AVEUM_CONNECTION_LIMIT_PER_HOST', '20'))
+KEEPALIVE_TIMEOUT = float(get_settings().get('AVEUM_KEEPALIVE_TIMEOUT', '30'))
+DNS_CACHE_TTL = int(get_settings().get('AVEUM_DNS_CACHE_TTL', '300'))
+
+# Timeouts in seconds. Reads are short so a hung request cannot stall a
+# web worker or a background sweep; writes and login get a little longer.
+CONNECT_TIMEOUT = float(get_settings().get('AVEUM_CONNECT_TIMEOUT', '3'))
+READ_TIMEOUT = float(get_settings().get('AVEUM_READ_TIMEOUT', '8'))
+WRITE_TIMEOUT = float(get_settings().get('AVEUM_WRITE_TIMEOUT', '15'))
+ENDPOINT_TIMEOUTS = {
+    'login': float(get_settings().get('AVEUM_LOGIN_TIMEOUT', '20')),
+    'profile': READ_TIMEOUT,
+    'checkBan': READ_TIMEOUT,
+    'hubStatus': READ_TIMEOUT,
+    'discoverFeed': READ_TIMEOUT,
+    'discoverOnlineUsers': READ_TIMEOUT,
+    'startHub': WRITE_TIMEOUT,
+    'stopHub': WRITE_TIMEOUT,
+    'claimReward': WRITE_TIMEOUT,
+    'toggleLike': WRITE_TIMEOUT
+}
+
+# Retries apply to GET requests only; writes are never repeated
+MAX_RETRIES = int(get_settings().get('AVEUM_MAX_RETRIES', '2'))
+# Consecutive failures that open the circuit, and seconds it stays open
+CIRCUIT_FAILURE_THRESHOLD = int(get_settings().get('AVEUM_CIRCUIT_FAILURES', '5'))
+CIRCUIT_RESET_TIMEOUT = float(get_settings().get('AVEUM_CIRCUIT_RESET', '30'))
+
+# Failures that say nothing about the request itself and may succeed later
+TRANSIENT_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+def _failure_result(result_class, error):
+    """Failed result for an exception, flagging transient ones as retryable"""
+    if isinstance(error, CircuitOpenError):
+        return result_class.failure(str(error), retryable=True)
+    if isinstance(error, asyncio.TimeoutError):
+        return result_class.failure('Aveum API request timed out', retryable=True)
+    if isinstance(error, aiohttp.ClientConnectionError):
+        return result_class.failure(f"Could not reach Aveum API: {error}", retryable=True)
+    return result_class.failure(str(error))
+
+class AveumClient:
+    """Aveum API client that keeps one pooled aiohttp session per event loop.
+
+    aiohttp sessions are bound to the loop they were created on, so the
+    client hands out a separate long-lived session for each running loop and
+    reuses its warm connections for every call made on that loop.
+    """
+
+    def __init__(self, base_url=None, limit=CONNECTION_LIMIT, limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=DNS_CACHE_TTL, cache=None,
+                 max_retries=MAX_RETRIES, breaker=None, retry_budget=None):
+        self.base_url = base_url
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self._sessions = {}
+        self.cache = cache if cache is not None else ReadCache()
+        self.max_retries = max_retries
+        self.breaker = breaker if breaker is not None else CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+        self.retry_budget = retry_budget if retry_budget is not None else RetryBudget()
+
+    def _url(self, endpoint):
+        return f"{self.base_url or API_BASE_URL}{API_ENDPOINTS[endpoint]}"
+
+    def _make_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache
+        )
+        timeout = aiohttp.ClientTimeout(total=WRITE_TIMEOUT, connect=CONNECT_TIMEOUT)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def get_session(self):
+        """Return the session for the running loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+
+        # Forget sessions whose loop has gone away (e.g. after asyncio.run)
+        for stale_loop in [l for l in self._sessions if l.is_closed()]:
+            del self._sessions[stale_loop]
+
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = self._make_session()
+            self._sessions[loop] = session
+        return session
+
+    async def start(self):
+        """Open the pooled session for the running loop ahead of the first call"""
+        await self.get_session()
+        return self
+
+    async def close(self):
+        """Close the session owned by the running loop"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _send(self, method, endpoint, token, json, path):
+        """One HTTP attempt; returns (status, decoded body)"""
+        session = await self.get_session()
+        timeout = aiohttp.ClientTimeout(total=ENDPOINT_TIMEOUTS.get(endpoint, WRITE_TIMEOUT), connect=CONNECT_TIMEOUT)
+        async with session.request(method, self._url(endpoint) + path,
+                                   data=json_codec.dumps(json) if json is not None else None,
+                                   headers=get_headers(token), timeout=timeout) as response:
+            body = await response.read()
+            try:
+                data = json_codec.loads(body) if body else None
+            except ValueError:
+                # Proxies answer outages with HTML; keep the status and move on
+                if response.status < 500:
+                    raise
+                data = None
+            return response.status, data
+
+    async def _request(self, method, endpoint, token=None, json=None, path=''):
+        """Send a request through the circuit breaker, retrying GETs on transient failures"""
+        started = time.perf_counter()
+        outcome = 'error'
+        attempts = 1 + (self.max_retries if method == 'GET' else 0)
+        self.retry_budget.deposit()
+        try:
+            for attempt in range(attempts):
+                if not self.breaker.allow():
+                    outcome = 'circuit_open'
+                    raise CircuitOpenError('Aveum API is unavailable, try again later')
+                last_attempt = attempt + 1 >= attempts
+                try:
+                    status, data = await self._send(method, endpoint, token, json, path)
+                except TRANSIENT_ERRORS:
+                    self.breaker.record_failure()
+                    if last_attempt or not self.retry_budget.withdraw():
+                        raise
+                else:
+                    if status >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    if not is_retryable_status(status) or last_attempt or not self.retry_budget.withdraw():
+                        outcome = 'success' if status < 400 else 'http_error'
+                        return status, data
+                metrics.api_retries.inc(endpoint=endpoint)
+                await asyncio.sleep(backoff_delay(attempt))
+        finally:
+            metrics.api_call_duration.observe(time.perf_counter() - started, endpoint=endpoint)
+            metrics.api_calls.inc(endpoint=endpoint, outcome=outcome)
+
+    async def _call(self, method, endpoint, token=None, json=None, path='', result_class=ApiResult):
+        try:
+            status, data = await self._request(method, endpoint, token, json, path)
+            return result_class.from_response(status, data)
+        except Exception as error:
+            return _failure_result(result_class, error)
+
+    async def login(self, email, password):
+        try:
+            payload = get_login_payload(email, password)
+            status, data = await self._request('POST', 'login', json=payload)
+            return LoginResult.from_login(status, data, payload)
+        except Exception as error:
+            return _failure_result(LoginResult, error)
+
+    async def _cached_get(self, endpoint, token, result_class, use_cache=True):
+        fetch = lambda: self._call('GET', endpoint, token, result_class=result_class)
+        if not use_cache:
+            return await fetch()
+        return await self.cache.get_or_fetch(endpoint, token, fetch, result_class)
+
+    async def _write(self, endpoint, token):
+        try:
+            return await self._call('POST', endpoint, token, json={})
+        finally:
+            # Hub state changes with every write, cached reads are now stale
+            await self.cache.invalidate(token)
+
+    async def get_user_profile(self, token, use_cache=True):
+        return await self._cached_get('profile', token, Profile, use_cache)
+
+    async def check_user_ban(self, token, use_cache=True):
+        return await self._cached_get('checkBan', token, BanStatus, use_cache)
+
+    async def start_hub_mining(self, token):
+        return await self._write('startHub', token)
+
+    async def stop_hub_mining(self, token):
+        return await self._write('stopHub', token)
+
+    async def get_hub_status(self, token, use_cache=True):
+        return await self._cached_get('hubStatus', token, HubStatus, use_cache)
+
+    async def claim_reward(self, token):
+        return await self._write('claimReward', token)
+
+    async def get_discover_feed(self, token, page=1, limit=20):
+        return await self._call('GET', 'discoverFeed', token, path=f"?page={page}&limit={limit}",
+                                result_class=FeedPage)
+
+    async def get_discover_online_users(self, token, page=1, limit=20):
+        return await self._call('GET', 'discoverOnlineUsers', token, path=f"?page={page}&limit={limit}",
+                                result_class=FeedPage)
+
+    async def toggle_like(self, token, user_id):
+        return await self._call('POST', 'toggleLike', token, json={}, path=str(user_id))
+
+# Shared client used by the module level API functions; its read cache uses
+# the CACHE_URL backend so web workers and the worker share upstream reads
+client = AveumClient(cache=ReadCache(backend=shared_cache))
+
+read_cache_events = metrics.registry.gauge(
+    'aveum_read_cache_events', 'Read cache lookups since startup by result', ('result',))
+read_cache_entries = metrics.registry.gauge(
+    'aveum_read_cache_entries', 'Entries held in the read cache')
+
+circuit_open = metrics.registry.gauge(
+    'aveum_api_circuit_open', 'Whether calls to the Aveum API are failing fast (1) or not (0)')
+circuit_opened = metrics.registry.gauge(
+    'aveum_api_circuit_opened', 'Times the Aveum API circuit has opened since startup')
+
+def _collect_cache_metrics():
+    # The worker scrapes on its event loop, so never query a shared backend's size here
+    stats = client.cache.stats(count_entries=False)
+    for result in ('hits', 'misses', 'coalesced'):
+        read_cache_events.set(stats[result], result=result)
+    if stats['entries'] is not None:
+        read_cache_entries.set(stats['entries'])
+    breaker = client.breaker.stats()
+    circuit_open.set(0 if breaker['state'] == CircuitBreaker.CLOSED else 1)
+    circuit_opened.set(breaker['times_opened'])
+
+metrics.registry.add_collector(_collect_cache_metrics)
+
+def get_client():
+    return client
+
 # API functions
 async def login(email, password):
-    try:
-        payload = get_login_payload(email, password)
-        headers = get_headers()
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{API_BASE_URL}{API_ENDPOINTS['login']}", 
-                json=payload, 
-                headers=headers
-            ) as response:
-                data = await response.json()
-                if 'token' in data:
-                    return {
-                        'success': True,
-                        'token': data['token'],
-                        'device_id': payload['device_id'],
-                        'device_model': payload['device_model'],
-                        'platform_version': payload['platform_version']
-                    }
-                else:
-                    error_message = data.get('message', 'Login failed')
-                    if isinstance(error_message, dict):
-                        error_message = error_message.get('error', 'Login failed')
-                    return {
-                        'success': False,
-                        'error': error_message
-                    }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
-
-async def get_user_profile(token):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{API_BASE_URL}{API_ENDPOINTS['profile']}", 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
-
-async def check_user_ban(token):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{API_BASE_URL}{API_ENDPOINTS['checkBan']}", 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
+    return await client.login(email, password)
+
+async def get_user_profile(token, use_cache=True):
+    return await client.get_user_profile(token, use_cache)
+
+async def check_user_ban(token, use_cache=True):
+    return await client.check_user_ban(token, use_cache)
 
 async def start_hub_mining(token):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{API_BASE_URL}{API_ENDPOINTS['startHub']}", 
-                json={}, 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
+    return await client.start_hub_mining(token)
 
 async def stop_hub_mining(token):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{API_BASE_URL}{API_ENDPOINTS['stopHub']}", 
-                json={}, 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
-
-async def get_hub_status(token):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{API_BASE_URL}{API_ENDPOINTS['hubStatus']}", 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
+    return await client.stop_hub_mining(token)
+
+async def get_hub_status(token, use_cache=True):
+    return await client.get_hub_status(token, use_cache)
 
 async def claim_reward(token):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{API_BASE_URL}{API_ENDPOINTS['claimReward']}", 
-                json={}, 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
+    return await client.claim_reward(token)
 
 async def get_discover_feed(token, page=1, limit=20):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{API_BASE_URL}{API_ENDPOINTS['discoverFeed']}?page={page}&limit={limit}", 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
+    return await client.get_discover_feed(token, page, limit)
 
 async def get_discover_online_users(token, page=1, limit=20):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{API_BASE_URL}{API_ENDPOINTS['discoverOnlineUsers']}?page={page}&limit={limit}", 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        }
+    return await client.get_discover_online_users(token, page, limit)
 
 async def toggle_like(token, user_id):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{API_BASE_URL}{API_ENDPOINTS['toggleLike']}{user_id}", 
-                json={}, 
-                headers=get_headers(token)
-            ) as response:
-                data = await response.json()
-                return {
-                    'success': True,
-                    'data': data
-                }
-    except Exception as error:
-        return {
-            'success': False,
-            'error': str(error)
-        } 
\ No newline at end of file
+    return await client.toggle_like(token, user_id)
+
+def cache_stats():
+    """Hit/miss counters of the shared client's read cache"""
+    return client.cache.stats()
+
+async def close():
+    """Close the shared client's session for the running loop"""
+    await client.close()
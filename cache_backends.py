@@ -0,0 +1,302 @@
+"""
+Key/value cache backends shared by the upstream read cache and the status path.
+
+CACHE_URL picks the backend:
+    memory://              in-process LRU with TTLs (the default)
+    redis://[:pw@]host[:port][/db], rediss://...
+                           any Redis-protocol server, shared by every process
+    sqlite:///path/to/file a SQLite file shared by the processes on one host
+    shm://name             the same in /dev/shm, i.e. shared memory
+
+Shared backends store str values (callers encode JSON) and never raise on
+a lookup: a backend that is down or slow counts as a miss, so a cache
+outage costs upstream calls rather than failed requests.
+"""
+import os
+import ssl
+import time
+import socket
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, unquote
+from config import get_settings
+import json_codec
+
+CACHE_URL = get_settings().get('CACHE_URL', 'memory://')
+# Seconds a shared backend may take to answer before the lookup is a miss
+CACHE_TIMEOUT = float(get_settings().get('CACHE_TIMEOUT', '0.25'))
+# Entries the in-process backend holds before evicting the least recently used
+CACHE_MAX_ENTRIES = int(get_settings().get('CACHE_MAX_ENTRIES', '10000'))
+
+class MemoryCache:
+    """LRU cache with per-entry TTLs, private to one process"""
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'backend': self.name, 'entries': len(self._entries), 'errors': 0}
+
+class SharedCache:
+    """Base for out-of-process backends: per-process connections, errors as misses"""
+
+    shared = True
+
+    # Seconds to skip the backend after an error instead of retrying every call
+    RETRY_AFTER = 5
+
+    def __init__(self):
+        self.errors = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _safe(self, operation, default=None):
+        if time.monotonic() < self._down_until:
+            return default
+        try:
+            return operation()
+        except Exception as error:
+            with self._lock:
+                self.errors += 1
+                self._down_until = time.monotonic() + self.RETRY_AFTER
+            self._reset()
+            print(f"{self.name} cache error, bypassing it for {self.RETRY_AFTER}s: {str(error)}")
+            return default
+
+    def _reset(self):
+        self._local.__dict__.clear()
+
+    def _entries(self):
+        return None
+
+    def stats(self):
+        return {'backend': self.name, 'entries': self._safe(self._entries), 'errors': self.errors}
+
+class RedisError(Exception):
+    pass
+
+class RedisCache(SharedCache):
+    """Minimal Redis protocol (RESP) client; enough for GET/SET/DEL.
+
+    Each thread of each process keeps one connection, opened on first use,
+    so forked web workers never share a socket.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, timeout=CACHE_TIMEOUT, prefix='aveum:'):
+        super().__init__()
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip('/') or 0)
+        self.use_ssl = parts.scheme == 'rediss'
+        self.timeout = timeout
+        self.prefix = prefix
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            if self.use_ssl:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+            local.sock, local.reader, local.pid = sock, sock.makefile('rb'), os.getpid()
+            if self.password:
+                auth = (self.username, self.password) if self.username else (self.password,)
+                self._command('AUTH', *auth)
+            if self.db:
+                self._command('SELECT', self.db)
+        return local.sock, local.reader
+
+    def _reset(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None and getattr(self._local, 'pid', None) == os.getpid():
+            try:
+                sock.close()
+            except OSError:
+                pass
+        super()._reset()
+
+    def _command(self, *args):
+        sock, reader = self._connection()
+        payload = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        sock.sendall(b''.join(payload))
+        return self._read_reply(reader)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Connection closed by Redis')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2].decode()
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def get(self, key):
+        return self._safe(lambda: self._command('GET', self.prefix + key))
+
+    def set(self, key, value, ttl):
+        self._safe(lambda: self._command('SET', self.prefix + key, value, 'PX', max(1, int(ttl * 1000))))
+
+    def delete(self, *keys):
+        if keys:
+            self._safe(lambda: self._command('DEL', *(self.prefix + key for key in keys)))
+
+    def clear(self):
+        # Only our own prefix; the server may be shared with other apps
+        def clear_prefix():
+            cursor = '0'
+            while True:
+                cursor, keys = self._command('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 500)
+                if keys:
+                    self._command('DEL', *keys)
+                if cursor == '0':
+                    break
+        self._safe(clear_prefix)
+
+class SQLiteCache(SharedCache):
+    """Cache table in a local SQLite file, shared by processes on one host.
+
+    Expiry uses wall-clock time because the processes share no clock
+    origin. Put the file on tmpfs (shm://) to keep it in memory.
+    """
+
+    name = 'sqlite'
+
+    # Expired rows are deleted every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path, timeout=CACHE_TIMEOUT):
+        super().__init__()
+        self.path = path
+        self.timeout = timeout
+        self._writes = 0
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Cached data can be rebuilt, so skip fsyncs
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache ('
+                         'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID')
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def get(self, key):
+        def lookup():
+            row = self._connection().execute(
+                'SELECT value FROM cache WHERE key = ? AND expires_at > ?', (key, time.time())).fetchone()
+            return row[0] if row else None
+        return self._safe(lookup)
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+
+        def store():
+            conn = self._connection()
+            now = time.time()
+            conn.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                         (key, value, now + ttl))
+            if purge:
+                conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+        self._safe(store)
+
+    def delete(self, *keys):
+        if keys:
+            marks = ','.join('?' * len(keys))
+            self._safe(lambda: self._connection().execute(f'DELETE FROM cache WHERE key IN ({marks})', keys))
+
+    def clear(self):
+        self._safe(lambda: self._connection().execute('DELETE FROM cache'))
+
+    def _entries(self):
+        return self._connection().execute('SELECT COUNT(*) FROM cache WHERE expires_at > ?', (time.time(),)).fetchone()[0]
+
+def make_cache(url=CACHE_URL):
+    scheme = url.split('://', 1)[0] if '://' in url else url
+    if scheme == 'memory':
+        return MemoryCache()
+    if scheme in ('redis', 'rediss'):
+        return RedisCache(url)
+    if scheme == 'sqlite':
+        return SQLiteCache(url[len('sqlite:///'):] or os.path.join(tempfile.gettempdir(), 'aveum-cache.sqlite3'))
+    if scheme == 'shm':
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        name = url[len('shm://'):] or 'aveum-cache'
+        return SQLiteCache(os.path.join(directory, f"{name}.sqlite3"))
+    print(f"Unknown CACHE_URL scheme {scheme!r}, using the in-process cache")
+    return MemoryCache()
+
+shared_cache = make_cache(CACHE_URL)
+
+def get_or_build(backend, key, ttl, build):
+    """Cached value for `key`, else build() it and store it for `ttl` seconds.
+
+    Values must be JSON serializable; shared backends store them encoded.
+    """
+    value = backend.get(key)
+    if value is not None:
+        return json_codec.loads(value) if backend.shared else value
+    value = build()
+    backend.set(key, json_codec.dumps(value) if backend.shared else value, ttl)
+    return value
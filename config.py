@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional
+from dotenv import dotenv_values
+
+ENV_PATH = os.path.join(os.getcwd(), '.env')
+
+# Minimum seconds between checks of the .env file's modification time
+CHECK_INTERVAL = 2
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable snapshot of the .env file"""
+    values: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    mtime: Optional[float] = None
+
+    def get(self, key, default=None):
+        # Real environment variables win over .env, as with load_dotenv()
+        value = os.environ.get(key)
+        if value is None:
+            value = self.values.get(key)
+        return default if value is None else value
+
+    @property
+    def aveum_email(self):
+        # Credentials are managed through the file, so the file wins here
+        return self.values.get('AVEUM_EMAIL') or os.environ.get('AVEUM_EMAIL')
+
+    @property
+    def aveum_password(self):
+        return self.values.get('AVEUM_PASSWORD') or os.environ.get('AVEUM_PASSWORD')
+
+_settings = None
+_last_check = 0.0
+_stale = False
+_lock = threading.Lock()
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def _load(path):
+    mtime = _mtime(path)
+    values = dotenv_values(path) if mtime is not None else {}
+    return Settings(MappingProxyType({k: v for k, v in values.items() if v is not None}), mtime)
+
+def get_settings(path=ENV_PATH):
+    """Return the current settings, re-reading .env only if it changed"""
+    global _settings, _last_check, _stale
+    now = time.monotonic()
+    settings = _settings
+    if settings is not None and not _stale and now - _last_check < CHECK_INTERVAL:
+        return settings
+
+    with _lock:
+        if _settings is None or _stale or _mtime(path) != _settings.mtime:
+            _settings = _load(path)
+            _stale = False
+        _last_check = now
+        return _settings
+
+def reload():
+    """Force the next get_settings() call to re-read the file"""
+    global _stale
+    _stale = True
+
+def _quote(value):
+    # Quote the value if it contains spaces or special characters
+    if any(c in value for c in ' \t\n\r\'"#'):
+        value = '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return value
+
+def save_env_credentials(email, password, path=ENV_PATH):
+    """Save Aveum credentials to the .env file atomically"""
+    with _lock:
+        env_content = dict(_load(path).values)
+        env_content['AVEUM_EMAIL'] = email
+        env_content['AVEUM_PASSWORD'] = password
+
+        # Write a temporary file next to .env, then swap it in
+        directory = os.path.dirname(path) or '.'
+        fd, temp_path = tempfile.mkstemp(prefix='.env.', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                for key, value in env_content.items():
+                    f.write(f"{key}={_quote(value)}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(path):
+                os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    reload()
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from collections import defaultdict
+from sqlalchemy import bindparam, func
+from models import db, User
+from stats import RollupBuffer
+import metrics
+
+# Seconds between flushes of buffered counter increments
+FLUSH_INTERVAL = 5
+
+class CounterBuffer:
+    """Collects per-user counter increments and writes them in batches.
+
+    Background loops call add() instead of incrementing a column and
+    committing. flush() applies everything gathered so far in one
+    transaction, with one executemany UPDATE per set of touched columns.
+    The same increments are added to the hourly and daily stats rollups
+    in that transaction.
+
+    value() reads a counter through the buffer: the stored column plus the
+    increments this process has not committed yet. The buffer lives in the
+    process that calls add(), normally the worker, so elsewhere value() is
+    just the stored column.
+    """
+
+    FIELDS = ('total_likes', 'like_errors', 'mining_sessions_completed',
+              'mining_errors', 'total_rewards')
+
+    # Stats rollup column each counter also adds to
+    ROLLUP = {
+        'total_likes': 'likes',
+        'like_errors': 'like_errors',
+        'mining_sessions_completed': 'sessions_completed',
+        'mining_errors': 'mining_errors',
+        'total_rewards': 'rewards'
+    }
+
+    def __init__(self):
+        self._pending = defaultdict(lambda: defaultdict(int))
+        # Increments taken by a flush that has not committed yet
+        self._flushing = {}
+        self._rollups = RollupBuffer()
+        self._lock = threading.Lock()
+
+    def add(self, user_id, field, amount=1):
+        if field not in self.FIELDS:
+            raise ValueError(f"Unknown counter: {field}")
+        with self._lock:
+            self._pending[user_id][field] += amount
+            self._rollups.add(user_id, self.ROLLUP[field], amount)
+
+    def add_stat(self, user_id, column, amount):
+        """Buffer a stats-only increment, e.g. earnings claimed from the hub"""
+        with self._lock:
+            self._rollups.add(user_id, column, amount)
+
+    def set_stat(self, user_id, column, value):
+        """Buffer the latest value of a stats gauge such as last_earning"""
+        with self._lock:
+            self._rollups.set(user_id, column, value)
+
+    def pending(self, user_id, field):
+        """Increments of `field` for a user that are not committed yet"""
+        with self._lock:
+            return sum(counts.get(field, 0) for counts in
+                       (self._pending.get(user_id), self._flushing.get(user_id)) if counts)
+
+    def value(self, user, field):
+        """Current value of a counter: the stored column plus unflushed increments"""
+        return (getattr(user, field) or 0) + self.pending(user.id, field)
+
+    def _merge_back(self, batch, rollups):
+        with self._lock:
+            for user_id, counts in batch.items():
+                for field, amount in counts.items():
+                    self._pending[user_id][field] += amount
+            self._flushing = {}
+            self._rollups.merge(rollups)
+
+    def flush(self):
+        """Write all buffered increments in a single transaction. Returns users updated."""
+        with self._lock:
+            batch, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+            self._flushing = batch
+            rollups, self._rollups = self._rollups, RollupBuffer()
+        users = set(batch) | rollups.users()
+        if not users:
+            self._flushing = {}
+            return 0
+
+        # Users touching the same columns share one executemany statement;
+        # stats-only changes still bump state_revision for the dashboard
+        groups = defaultdict(list)
+        for user_id in users:
+            counts = batch.get(user_id, {})
+            fields = tuple(sorted(field for field, amount in counts.items() if amount))
+            params = {f'inc_{field}': counts[field] for field in fields}
+            params['user_id'] = user_id
+            groups[fields].append(params)
+
+        table = User.__table__
+        try:
+            for fields, rows in groups.items():
+                values = {field: func.coalesce(table.c[field], 0) + bindparam(f'inc_{field}') for field in fields}
+                values['state_revision'] = table.c.state_revision + 1
+                statement = table.update().where(table.c.id == bindparam('user_id')).values(**values)
+                db.session.execute(statement, rows)
+            rollups.write()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self._merge_back(batch, rollups)
+            raise
+        finally:
+            with self._lock:
+                self._flushing = {}
+        return len(users)
+
+    async def flush_periodically(self, interval=FLUSH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.flush()
+            except Exception as error:
+                metrics.background_errors.inc(loop='counter_flush')
+                print(f"Error flushing counters: {str(error)}")
+            finally:
+                db.session.remove()
+
+counter_buffer = CounterBuffer()
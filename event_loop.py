@@ -0,0 +1,98 @@
+import os
+import atexit
+import asyncio
+import threading
+import concurrent.futures
+from config import get_settings
+
+# Default number of seconds a synchronous caller waits for a submitted coroutine
+DEFAULT_TIMEOUT = float(get_settings().get('AVEUM_CALL_TIMEOUT', '30'))
+
+class BackgroundLoop:
+    """A process-wide asyncio loop running in a daemon thread.
+
+    Synchronous code (Flask views, CLI tools) submits coroutines to it
+    instead of calling asyncio.run(), so every caller shares one loop and
+    the connections pooled on it.
+    """
+
+    def __init__(self, name='aveum-event-loop'):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _run(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def start(self):
+        """Start the loop thread if it is not already running in this process"""
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(target=self._run, args=(loop, ready), name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop = loop
+            self._thread = thread
+            self._pid = os.getpid()
+            return loop
+
+    @property
+    def loop(self):
+        return self.start()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=DEFAULT_TIMEOUT):
+        """Run a coroutine on the loop and block until it finishes.
+
+        Raises concurrent.futures.TimeoutError (after cancelling the
+        coroutine) if it does not finish within `timeout` seconds.
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout=5):
+        """Run shutdown hooks, stop the loop and wait for the thread to exit"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+            self._loop = None
+            self._thread = None
+
+        import aveum_api
+        try:
+            asyncio.run_coroutine_threadsafe(aveum_api.close(), loop).result(timeout)
+        except Exception as error:
+            print(f"Error closing Aveum API session: {str(error)}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+background_loop = BackgroundLoop()
+
+def submit(coro):
+    return background_loop.submit(coro)
+
+def run_async(coro, timeout=DEFAULT_TIMEOUT):
+    return background_loop.run(coro, timeout)
+
+atexit.register(background_loop.stop)
@@ -0,0 +1,80 @@
+import time
+import threading
+from sqlalchemy import event
+from models import db, User, ActivityEvent
+import metrics
+
+class ChangeBroker:
+    """In-process notifier that wakes listeners when a user's data changes.
+
+    It carries no payload: a woken listener re-reads what it needs from the
+    database, so a change committed by another process is still picked up the
+    next time the listener wakes on its own timeout.
+    """
+
+    def __init__(self):
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        listener = threading.Event()
+        with self._lock:
+            self._listeners.setdefault(user_id, set()).add(listener)
+        return listener
+
+    def unsubscribe(self, user_id, listener):
+        with self._lock:
+            listeners = self._listeners.get(user_id)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    del self._listeners[user_id]
+
+    def publish(self, user_id):
+        with self._lock:
+            listeners = list(self._listeners.get(user_id, ()))
+        for listener in listeners:
+            listener.set()
+
+broker = ChangeBroker()
+
+def _changed_user_ids(session):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, User):
+            yield obj.id
+        elif isinstance(obj, ActivityEvent):
+            yield obj.user_id
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_revisions(session, flush_context, instances):
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            # Increment in SQL so concurrent writers never reuse a revision
+            obj.state_revision = User.state_revision + 1
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    changed.update(user_id for user_id in _changed_user_ids(session) if user_id is not None)
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_changes(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        broker.publish(user_id)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_changes(session, previous_transaction):
+    session.info.pop('changed_user_ids', None)
+    session.info.pop('commit_started', None)
+
+# Commit metrics; before_commit runs ahead of the final flush, so it is timed too
+@event.listens_for(db.session, 'before_commit')
+def _start_commit_timer(session):
+    session.info['commit_started'] = time.perf_counter()
+
+@event.listens_for(db.session, 'after_commit')
+def _record_commit(session):
+    started = session.info.pop('commit_started', None)
+    metrics.db_commits.inc()
+    if started is not None:
+        metrics.db_commit_duration.observe(time.perf_counter() - started)
@@ -0,0 +1,107 @@
+"""
+Application factories
+
+create_app() builds the full web app. The views, assets, login handling
+and request metrics are imported inside it, so nothing web-related loads
+until a web app is actually built.
+
+CLI tools, migrations and the worker only need the database. They use
+db_context(), which pushes an app context on a minimal Flask app with
+just the database configured:
+
+    from factory import db_context
+
+    with db_context():
+        User.query.count()
+
+`gunicorn --preload app:app` builds the app once in the master process
+and forks workers from it. Startup work that touches the database
+disposes the engine's pool afterwards, so no worker inherits a
+connection opened by the master.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from flask import Flask
+from models import db
+from database import configure_database
+from config import get_settings
+import events  # Registers the session listeners every writer relies on
+
+def _base_app(config):
+    config = dict(config or {})
+    app = Flask(__name__)
+    configure_database(app, config.pop('SQLALCHEMY_DATABASE_URI', None))
+    app.config.update(config)
+    db.init_app(app)
+    return app
+
+def create_db_app(config=None):
+    """A Flask app with only the database configured"""
+    return _base_app(config)
+
+_db_app = None
+
+def get_db_app():
+    global _db_app
+    if _db_app is None:
+        _db_app = create_db_app()
+    return _db_app
+
+@contextmanager
+def db_context():
+    """App context for database work outside the web app"""
+    with get_db_app().app_context():
+        yield
+
+def _register_request_metrics(app):
+    from flask import g, request
+    import metrics
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        # Label by route pattern, not the raw path, to keep the series count bounded
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.http_request_duration.observe(time.perf_counter() - started,
+                                                  method=request.method, endpoint=endpoint)
+        metrics.http_requests.inc(method=request.method, endpoint=endpoint, status=str(response.status_code))
+        return response
+
+def create_app(config=None):
+    """Build the web app. `config` overrides settings, e.g. for tests.
+
+    RUN_MIGRATIONS (default True) applies pending schema migrations at
+    startup.
+    """
+    app = _base_app({
+        # Set SECRET_KEY so sessions survive restarts and are shared by workers
+        'SECRET_KEY': get_settings().get('SECRET_KEY') or os.urandom(24),
+        'RUN_MIGRATIONS': True,
+        **(config or {})
+    })
+
+    from assets import assets
+    from auth import login_manager
+    from views import views
+    from api_views import api_views
+
+    assets.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(views)
+    app.register_blueprint(api_views)
+    _register_request_metrics(app)
+
+    if app.config['RUN_MIGRATIONS']:
+        from migrate import run_migrations
+        with app.app_context():
+            run_migrations()
+            db.engine.dispose()
+
+    return app
@@ -0,0 +1,242 @@
+"""
+Fake Aveum API server
+
+A local stand-in for api.aveum.io that implements the endpoints in
+aveum_api.API_ENDPOINTS, for exercising the background engines offline.
+Point the app at it with AVEUM_API_BASE_URL:
+
+    python fake_aveum_server.py --port 8900 --latency 0.05 --error-rate 0.01
+    AVEUM_API_BASE_URL=http://127.0.0.1:8900 python -m worker
+
+Any email/password logs in. Tokens are JWT-shaped with an `exp` claim and
+are rejected with 401 once expired. Hub sessions last --session-length
+seconds and report `remainingTime` in hours. GET /__stats returns request
+counts and claim latencies.
+"""
+
+import json
+import time
+import base64
+import random
+import asyncio
+import argparse
+import secrets
+from collections import Counter
+from aiohttp import web
+from aveum_api import API_ENDPOINTS
+
+def make_token(email, ttl):
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+    claims = {'sub': email, 'iat': int(time.time()), 'exp': int(time.time() + ttl)}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.{secrets.token_hex(8)}"
+
+def read_token(token):
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except Exception:
+        return None
+
+class Account:
+    def __init__(self, email):
+        self.email = email
+        self.session_start = None
+        self.session_end = None
+        self.claimed = True
+        self.likes = 0
+
+class FakeAveum:
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0, token_ttl=3600,
+                 session_length=60, earning_rate=0.01, feed_size=20):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.session_length = session_length
+        self.earning_rate = earning_rate
+        self.feed_size = feed_size
+        self.accounts = {}
+        self.requests = Counter()
+        self.errors = Counter()
+        self.claim_latencies = []
+        self.started = time.monotonic()
+
+    # Helpers
+
+    def account(self, email):
+        if email not in self.accounts:
+            self.accounts[email] = Account(email)
+        return self.accounts[email]
+
+    async def simulate(self, name):
+        """Count the call, wait the configured latency and maybe fail it"""
+        self.requests[name] += 1
+        delay = self.latency + random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors[name] += 1
+            raise web.HTTPInternalServerError(text=json.dumps({'message': 'Internal error'}),
+                                              content_type='application/json')
+
+    def authenticate(self, request):
+        header = request.headers.get('authorization', '')
+        claims = read_token(header[len('Bearer '):]) if header.startswith('Bearer ') else None
+        if not claims or claims.get('exp', 0) < time.time():
+            raise web.HTTPUnauthorized(text=json.dumps({'message': 'Unauthorized'}),
+                                       content_type='application/json')
+        return self.account(claims['sub'])
+
+    def hub_status(self, account):
+        now = time.time()
+        if account.session_start is None:
+            return {'isHub': False, 'currentEarning': 0, 'remainingTime': 0}
+        elapsed = min(now, account.session_end) - account.session_start
+        return {
+            'isHub': True,
+            'currentEarning': round(elapsed * self.earning_rate, 6),
+            'remainingTime': max(0.0, account.session_end - now) / 3600
+        }
+
+    def start_session(self, account):
+        now = time.time()
+        account.session_start = now
+        account.session_end = now + self.session_length
+        account.claimed = False
+
+    # Handlers
+
+    async def login(self, request):
+        await self.simulate('login')
+        payload = await request.json()
+        if not payload.get('email') or not payload.get('password'):
+            return web.json_response({'message': {'error': 'Invalid credentials'}}, status=400)
+        self.account(payload['email'])
+        return web.json_response({'token': make_token(payload['email'], self.token_ttl)})
+
+    async def profile(self, request):
+        await self.simulate('profile')
+        account = self.authenticate(request)
+        return web.json_response({'email': account.email, 'likes': account.likes})
+
+    async def check_ban(self, request):
+        await self.simulate('checkBan')
+        self.authenticate(request)
+        return web.json_response({'banned': False})
+
+    async def hub_status_handler(self, request):
+        await self.simulate('hubStatus')
+        return web.json_response(self.hub_status(self.authenticate(request)))
+
+    async def start_hub(self, request):
+        await self.simulate('startHub')
+        account = self.authenticate(request)
+        if account.session_start is not None and time.time() < account.session_end:
+            return web.json_response({'message': 'Hub already running'}, status=400)
+        self.start_session(account)
+        return web.json_response({'message': 'Hub started'})
+
+    async def stop_hub(self, request):
+        await self.simulate('stopHub')
+        account = self.authenticate(request)
+        account.session_start = account.session_end = None
+        return web.json_response({'message': 'Hub stopped'})
+
+    async def claim_reward(self, request):
+        await self.simulate('claimReward')
+        account = self.authenticate(request)
+        now = time.time()
+        if account.session_start is None or now < account.session_end or account.claimed:
+            return web.json_response({'message': 'Nothing to claim'}, status=400)
+        self.claim_latencies.append(now - account.session_end)
+        reward = self.hub_status(account)['currentEarning']
+        account.claimed = True
+        account.session_start = account.session_end = None
+        return web.json_response({'message': 'Reward claimed', 'reward': reward})
+
+    def _page(self, request, id_offset):
+        page = int(request.query.get('page', 1))
+        limit = min(int(request.query.get('limit', self.feed_size)), self.feed_size)
+        first = id_offset + (page - 1) * limit
+        return [{'id': first + i, 'username': f"user{first + i}", 'is_liked': False} for i in range(limit)]
+
+    async def discover_feed(self, request):
+        await self.simulate('discoverFeed')
+        self.authenticate(request)
+        return web.json_response({'users': self._page(request, 100000)})
+
+    async def discover_online_users(self, request):
+        await self.simulate('discoverOnlineUsers')
+        self.authenticate(request)
+        return web.json_response({'users': self._page(request, 200000)})
+
+    async def toggle_like(self, request):
+        await self.simulate('toggleLike')
+        account = self.authenticate(request)
+        account.likes += 1
+        return web.json_response({'liked': True, 'user_id': request.match_info['user_id']})
+
+    async def stats(self, request):
+        return web.json_response(self.stats_snapshot())
+
+    def stats_snapshot(self):
+        latencies = sorted(self.claim_latencies)
+        elapsed = time.monotonic() - self.started
+        total = sum(self.requests.values())
+        return {
+            'elapsed_seconds': elapsed,
+            'requests': dict(self.requests),
+            'errors': dict(self.errors),
+            'total_requests': total,
+            'requests_per_second': total / elapsed if elapsed else 0.0,
+            'claims': len(latencies),
+            'claim_latency_avg': sum(latencies) / len(latencies) if latencies else None,
+            'claim_latency_p95': latencies[int(len(latencies) * 0.95)] if latencies else None,
+            'claim_latency_max': latencies[-1] if latencies else None
+        }
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post(API_ENDPOINTS['login'], self.login)
+        app.router.add_get(API_ENDPOINTS['profile'], self.profile)
+        app.router.add_get(API_ENDPOINTS['checkBan'], self.check_ban)
+        app.router.add_get(API_ENDPOINTS['hubStatus'], self.hub_status_handler)
+        app.router.add_post(API_ENDPOINTS['startHub'], self.start_hub)
+        app.router.add_post(API_ENDPOINTS['stopHub'], self.stop_hub)
+        app.router.add_post(API_ENDPOINTS['claimReward'], self.claim_reward)
+        app.router.add_get(API_ENDPOINTS['discoverFeed'], self.discover_feed)
+        app.router.add_get(API_ENDPOINTS['discoverOnlineUsers'], self.discover_online_users)
+        app.router.add_post(API_ENDPOINTS['toggleLike'] + '{user_id}', self.toggle_like)
+        app.router.add_get('/__stats', self.stats)
+        return app
+
+    async def start(self, host='127.0.0.1', port=8900):
+        """Start serving on the running loop; returns the aiohttp runner"""
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+def add_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.0, help='Base response latency in seconds')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Extra random latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--token-ttl', type=int, default=3600, help='Token lifetime in seconds')
+    parser.add_argument('--session-length', type=int, default=60, help='Hub session length in seconds')
+
+def from_arguments(args):
+    return FakeAveum(latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                     token_ttl=args.token_ttl, session_length=args.session_length)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Aveum API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(from_arguments(args).make_app(), host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
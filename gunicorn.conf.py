@@ -0,0 +1,21 @@
+"""
+Gunicorn settings for the web service (loaded with -c gunicorn.conf.py).
+
+Each open dashboard keeps an /api/events Server-Sent Events stream for up
+to SSE_MAX_DURATION seconds, so the default single sync worker would be
+tied up by one tab and killed by the worker timeout. gthread workers
+serve each request on its own thread and heartbeat from the main loop, so
+a long stream neither blocks other requests nor trips the timeout.
+"""
+import os
+
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Concurrent requests per worker, open event streams included
+threads = int(os.getenv('WEB_THREADS', '32'))
+# Seconds a worker may stop heartbeating before it is restarted
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
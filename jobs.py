@@ -0,0 +1,239 @@
+"""
+Per-user background jobs run by the worker service: the hub mining check
+and the auto-like loop, plus the token manager they share with the views.
+"""
+
+import asyncio
+from datetime import datetime
+import aveum_api
+from models import db, User
+from counters import counter_buffer
+from tokens import TokenManager, is_auth_failure
+from config import get_settings
+from activity import log_activity
+from factory import db_context
+
+def load_env_credentials(for_display=False):
+    """Load Aveum credentials from .env file or return default placeholders"""
+    if for_display:
+        # Return default placeholder values for display
+        return {
+            'email': 'your-email@gmail.com',
+            'password': 'your-password'
+        }
+    else:
+        # Return actual credentials for API calls
+        settings = get_settings()
+        return {
+            'email': settings.aveum_email,
+            'password': settings.aveum_password
+        }
+
+def get_refresh_credentials(user):
+    """Credentials used to renew a user's token: their own, else the .env ones"""
+    if user.aveum_email and user.aveum_password:
+        return user.aveum_email, user.aveum_password
+    env_credentials = load_env_credentials()
+    return env_credentials['email'], env_credentials['password']
+
+token_manager = TokenManager(get_refresh_credentials)
+
+# Background tasks
+async def run_auto_like(user_id):
+    """Background task to run auto-like process"""
+    with db_context():
+        user = User.query.get(user_id)
+        if not user or not user.auto_like_active:
+            return
+        
+        while user.auto_like_active:
+            try:
+                if not user.aveum_token:
+                    user.auto_like_active = False
+                    db.session.commit()
+                    break
+                    
+                # Refresh the token first if it is about to expire
+                if token_manager.needs_refresh(user):
+                    if await token_manager.ensure_token(user):
+                        db.session.commit()
+                    else:
+                        log_activity(user.id, 'auto_like', "Auto-like stopped: Failed to refresh token")
+                        user.auto_like_active = False
+                        db.session.commit()
+                        return
+                
+                # Continue with auto-like process
+                processed_user_ids = set()
+                page = 1
+                max_pages = 5
+                
+                while page <= max_pages and user.auto_like_active:
+                    # Get users from discover feed
+                    feed_result = await aveum_api.get_discover_feed(user.aveum_token, page, 20)
+                    
+                    if is_auth_failure(feed_result):
+                        # Token was revoked early; refresh it before going on
+                        token_manager.invalidate(user)
+                        db.session.commit()
+                        break
+                    
+                    if not feed_result.ok:
+                        log_activity(user.id, 'auto_like', f"Error fetching discover feed: {feed_result.error_message()}")
+                        db.session.commit()
+                        break
+                    
+                    liked_count = 0
+                    
+                    # Likes on this page are logged with one commit when it ends,
+                    # not one per like; the finally also keeps them if stopped
+                    liked = []
+                    try:
+                        for user_data in feed_result.users:
+                            if not user.auto_like_active:
+                                break
+                            
+                            user_id = user_data.id
+                            if not user_id or user_id in processed_user_ids:
+                                continue
+                            
+                            if user_data.is_liked:
+                                processed_user_ids.add(user_id)
+                                continue
+                            
+                            # Like the user
+                            like_result = await aveum_api.toggle_like(user.aveum_token, user_id)
+                            
+                            if is_auth_failure(like_result):
+                                token_manager.invalidate(user)
+                                db.session.commit()
+                                break
+                            
+                            if like_result.ok:
+                                processed_user_ids.add(user_id)
+                                counter_buffer.add(user.id, 'total_likes')
+                                liked_count += 1
+                                
+                                username = user_data.username or 'Unknown'
+                                liked.append((datetime.now(), f"Liked user: {username} (ID: {user_id})"))
+                            else:
+                                counter_buffer.add(user.id, 'like_errors')
+                            
+                            # Random delay between likes
+                            await asyncio.sleep(aveum_api.get_random_delay(2, 5))
+                    finally:
+                        for timestamp, message in liked:
+                            log_activity(user.id, 'like', message, timestamp)
+                        if liked:
+                            db.session.commit()
+                    
+                    if token_manager.needs_refresh(user) or (liked_count == 0 and page > 1):
+                        break
+                    
+                    page += 1
+                    
+                    if page <= max_pages and user.auto_like_active:
+                        await asyncio.sleep(aveum_api.get_random_delay(5, 10))
+                
+                # Take a break before next cycle, unless the token needs refreshing
+                if token_manager.needs_refresh(user):
+                    continue
+                if user.auto_like_active:
+                    delay = aveum_api.get_random_delay(60, 120)
+                    log_activity(user.id, 'auto_like', f"Auto-like cycle completed. Next run in {delay} seconds.")
+                    db.session.commit()
+                    await asyncio.sleep(delay)
+            
+            except Exception as error:
+                db.session.rollback()
+                print(f"Error in auto-like process: {str(error)}")
+                await asyncio.sleep(30)  # Wait before retrying
+
+# Mining check task
+# How many seconds one unit of the hub's `remainingTime` represents
+REMAINING_TIME_UNIT = float(get_settings().get('AVEUM_REMAINING_TIME_UNIT', '3600'))
+# Re-read hub status at least this often so earnings stay current
+MAX_CHECK_INTERVAL = 300
+# Delay after starting or claiming a session, and after a failed check
+SHORT_CHECK_INTERVAL = 30
+
+async def check_user_mining(user_id):
+    """Check one user's hub session, claiming and restarting it when done.
+
+    Returns the number of seconds until the user should be checked again,
+    or None once the user no longer has mining enabled.
+    """
+    try:
+        user = User.query.get(user_id)
+        if not user or not user.mining_active:
+            return None
+        
+        # Refresh the token ahead of expiry, without asking upstream
+        if token_manager.needs_refresh(user):
+            if not await token_manager.ensure_token(user):
+                counter_buffer.add(user.id, 'mining_errors')
+                return SHORT_CHECK_INTERVAL
+            db.session.commit()
+        
+        # Check hub status
+        hub_status = await aveum_api.get_hub_status(user.aveum_token)
+        
+        if is_auth_failure(hub_status):
+            # Token was revoked before its expiry; log in again once
+            token_manager.invalidate(user)
+            if await token_manager.ensure_token(user):
+                db.session.commit()
+                
+                # Try hub status again with new token
+                hub_status = await aveum_api.get_hub_status(user.aveum_token)
+        
+        next_check = SHORT_CHECK_INTERVAL
+        if hub_status.ok:
+            if hub_status.is_hub:
+                if hub_status.current_earning is not None:
+                    user.total_rewards = hub_status.current_earning
+                    counter_buffer.set_stat(user.id, 'last_earning', hub_status.current_earning)
+                
+                remaining = hub_status.remaining_time
+                if remaining <= 0.001:
+                    # Mining complete, claim reward and start new session
+                    claim_result = await aveum_api.claim_reward(user.aveum_token)
+                    
+                    if claim_result.ok:
+                        counter_buffer.add(user.id, 'mining_sessions_completed')
+                        if hub_status.current_earning is not None:
+                            # Keep the claimed session's earnings before the hub resets them
+                            counter_buffer.add_stat(user.id, 'earnings', hub_status.current_earning)
+                        log_activity(user.id, 'mining', "Mining complete. Reward claimed.")
+                        
+                        # Start new mining session
+                        mining_result = await aveum_api.start_hub_mining(user.aveum_token)
+                        
+                        if mining_result.ok:
+                            log_activity(user.id, 'mining', "New mining session started.")
+                        else:
+                            counter_buffer.add(user.id, 'mining_errors')
+                            log_activity(user.id, 'mining', f"Failed to start new mining session: {mining_result.error_message()}")
+                    else:
+                        counter_buffer.add(user.id, 'mining_errors')
+                        log_activity(user.id, 'mining', f"Failed to claim reward: {claim_result.error_message()}")
+                else:
+                    # Wake up right as the session expires
+                    next_check = min(remaining * REMAINING_TIME_UNIT + 1, MAX_CHECK_INTERVAL)
+            else:
+                # Mining not active, start it
+                mining_result = await aveum_api.start_hub_mining(user.aveum_token)
+                
+                if mining_result.ok:
+                    log_activity(user.id, 'mining', "Mining was inactive. Started automatically.")
+                else:
+                    counter_buffer.add(user.id, 'mining_errors')
+                    log_activity(user.id, 'mining', f"Failed to start mining: {mining_result.error_message()}")
+        
+        db.session.commit()
+        return next_check
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.remove()
@@ -0,0 +1,85 @@
+import json
+import uuid
+import decimal
+import dataclasses
+from datetime import date
+from werkzeug.http import http_date
+from config import get_settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 'auto' picks the fastest installed codec; 'orjson' or 'json' force one
+JSON_CODEC = get_settings().get('JSON_CODEC', 'auto')
+
+def _default(obj):
+    """Same conversions as Flask's JSONEncoder, so both codecs agree"""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class StdlibCodec:
+    name = 'json'
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=_default, separators=(',', ':'))
+
+class OrjsonCodec:
+    name = 'orjson'
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        # Route dates through _default so they match the stdlib output
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME
+                            | orjson.OPT_NON_STR_KEYS).decode()
+
+CODECS = {'json': StdlibCodec}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec
+
+def make_codec(name='auto'):
+    if name == 'auto':
+        name = 'orjson' if 'orjson' in CODECS else 'json'
+    if name not in CODECS:
+        print(f"JSON codec {name!r} is not available, using the standard library")
+        name = 'json'
+    return CODECS[name]()
+
+codec = make_codec(JSON_CODEC)
+
+def set_codec(name):
+    global codec
+    codec = make_codec(name)
+    return codec
+
+def loads(data):
+    """Decode JSON from str or bytes"""
+    return codec.loads(data)
+
+def dumps(obj):
+    """Encode to a compact JSON string"""
+    return codec.dumps(obj)
+
+def jsonify(*args, **kwargs):
+    """Drop-in for flask.jsonify that encodes with the active codec"""
+    from flask import current_app
+    if args and kwargs:
+        raise TypeError('jsonify() behavior undefined when passed both args and kwargs')
+    if len(args) == 1:
+        data = args[0]
+    else:
+        data = args or kwargs
+    return current_app.response_class(dumps(data) + '\n', mimetype=current_app.config['JSONIFY_MIMETYPE'])
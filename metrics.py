@@ -0,0 +1,199 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from fast local calls up to slow upstream requests
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+class Registry:
+    """Process-wide set of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def add_collector(self, collector):
+        """Register a callable run before each scrape, e.g. to refresh gauges"""
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector):
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def expose(self):
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as error:
+                print(f"Metrics collector failed: {str(error)}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Web requests
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests handled', ('method', 'endpoint', 'status'))
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request handling time', ('method', 'endpoint'))
+
+# Upstream Aveum API
+api_calls = registry.counter(
+    'aveum_api_calls_total', 'Aveum API calls by outcome', ('endpoint', 'outcome'))
+api_call_duration = registry.histogram(
+    'aveum_api_call_duration_seconds', 'Aveum API call latency, retries included', ('endpoint',))
+api_retries = registry.counter(
+    'aveum_api_retries_total', 'Aveum API GET requests retried', ('endpoint',))
+
+# Background loops
+scheduler_checks = registry.counter(
+    'scheduler_checks_total', 'Per-user scheduler checks by outcome', ('scheduler', 'outcome'))
+scheduler_check_duration = registry.histogram(
+    'scheduler_check_duration_seconds', 'Per-user scheduler check duration', ('scheduler',))
+scheduler_lag = registry.histogram(
+    'scheduler_lag_seconds', 'Delay between a check coming due and starting', ('scheduler',))
+scheduler_users = registry.gauge(
+    'scheduler_users', 'Users queued or running in a scheduler', ('scheduler', 'state'))
+background_loop_duration = registry.histogram(
+    'background_loop_duration_seconds', 'Duration of one pass of a background loop', ('loop',))
+mining_tick_users = registry.gauge(
+    'mining_tick_users', 'Users credited by the last simulated mining tick')
+worker_jobs = registry.gauge(
+    'worker_jobs', 'Per-user jobs running in this worker', ('kind',))
+worker_shards = registry.gauge(
+    'worker_shards', 'User shards leased by this worker')
+background_errors = registry.counter(
+    'background_errors_total', 'Errors in background loops', ('loop',))
+
+# Database
+db_commits = registry.counter(
+    'db_commits_total', 'Database session commits')
+db_commit_duration = registry.histogram(
+    'db_commit_duration_seconds', 'Database commit time (flush included)')
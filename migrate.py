@@ -0,0 +1,85 @@
+"""
+Schema migration runner
+
+The schema_version table records every applied step from
+migrations.MIGRATIONS. Startup reads the current version and returns
+straight away when nothing is pending. Otherwise it takes a database-wide
+lock and applies the pending steps and their version rows in one
+transaction, so concurrent web and worker boots cannot both migrate.
+
+A brand-new database is created from the models and stamped with the
+latest version. A database from before schema_version existed is treated
+as version 0; every step only adds what is missing, so such a database is
+brought up to date too.
+
+    python migrate.py
+"""
+
+from datetime import datetime
+from sqlalchemy import inspect, func, select
+from models import db, SchemaVersion
+from factory import db_context
+from migrations import MIGRATIONS, HEAD
+
+# Arbitrary key for the PostgreSQL advisory lock held while migrating
+ADVISORY_LOCK_KEY = 4217301
+
+def _read_version(conn):
+    """Highest applied version, or None when schema_version does not exist"""
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return None
+    return conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+def _lock(conn):
+    if conn.dialect.name == 'sqlite':
+        # pysqlite does not open a transaction before DDL on its own.
+        # BEGIN IMMEDIATE both opens one and takes the write lock.
+        conn.exec_driver_sql('BEGIN IMMEDIATE')
+    elif conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(f'SELECT pg_advisory_xact_lock({ADVISORY_LOCK_KEY})')
+
+def _record(conn, steps):
+    now = datetime.now()
+    conn.execute(SchemaVersion.__table__.insert(), [
+        {'version': version, 'name': name, 'applied_at': now} for version, name, _ in steps
+    ])
+
+def run_migrations(engine=None):
+    """Bring the database schema up to date; returns the number of steps applied"""
+    engine = engine or db.engine
+
+    with engine.connect() as conn:
+        if _read_version(conn) == HEAD:
+            return 0
+
+    with engine.connect() as conn:
+        with conn.begin():
+            _lock(conn)
+            version = _read_version(conn)
+            if version is None:
+                fresh = not inspect(conn).has_table('user')
+                SchemaVersion.__table__.create(conn)
+                if fresh:
+                    db.metadata.create_all(conn)
+                    _record(conn, MIGRATIONS)
+                    print(f"Created database schema at version {HEAD}")
+                    return 0
+                version = 0
+
+            pending = [step for step in MIGRATIONS if step[0] > version]
+            if not pending:
+                # Another process migrated while we waited for the lock
+                return 0
+            for step_version, name, upgrade in pending:
+                print(f"Applying migration {step_version}: {name}")
+                upgrade(conn)
+            _record(conn, pending)
+            return len(pending)
+
+def main():
+    with db_context():
+        applied = run_migrations()
+        print(f"Applied {applied} migrations" if applied else f"Schema is up to date (version {HEAD})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Ordered schema migrations, applied by migrate.run_migrations().
+
+Append new steps with the next version number; never renumber or edit a
+step that has shipped. Each step is `upgrade(conn)` running on the
+migration transaction's connection.
+"""
+
+from migrations import (
+    add_balance_column,
+    add_is_mining_column,
+    add_tracking_columns,
+    add_state_revision,
+    add_token_expiry,
+    create_activity_event,
+    create_worker_tables,
+    create_stats_tables,
+    add_user_state_indexes,
+    import_legacy_activity
+)
+
+MIGRATIONS = [
+    (1, 'add_balance_column', add_balance_column.upgrade),
+    (2, 'add_is_mining_column', add_is_mining_column.upgrade),
+    (3, 'add_tracking_columns', add_tracking_columns.upgrade),
+    (4, 'add_state_revision', add_state_revision.upgrade),
+    (5, 'add_token_expiry', add_token_expiry.upgrade),
+    (6, 'create_activity_event', create_activity_event.upgrade),
+    (7, 'create_worker_tables', create_worker_tables.upgrade),
+    (8, 'create_stats_tables', create_stats_tables.upgrade),
+    (9, 'add_user_state_indexes', add_user_state_indexes.upgrade),
+    (10, 'import_legacy_activity', import_legacy_activity.upgrade)
+]
+
+HEAD = MIGRATIONS[-1][0]
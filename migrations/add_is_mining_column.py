@@ -1,30 +1,10 @@
-from flask import Flask
-from models import db
-from sqlalchemy import text
+from sqlalchemy import Column, Boolean, false
+from migrations.util import add_columns, drop_columns
 
-def upgrade():
-    # Create a temporary Flask app context
-    app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///aveum.db'
-    db.init_app(app)
-    
-    with app.app_context():
-        # Add is_mining column to User table
-        with db.engine.connect() as conn:
-            conn.execute(text("ALTER TABLE user ADD COLUMN is_mining BOOLEAN DEFAULT FALSE"))
-            conn.commit()
+def upgrade(conn):
+    # Add is_mining column to User table
+    add_columns(conn, 'user', [Column('is_mining', Boolean, server_default=false())])
 
-def downgrade():
-    # Create a temporary Flask app context
-    app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///aveum.db'
-    db.init_app(app)
-    
-    with app.app_context():
-        # Remove is_mining column from User table
-        with db.engine.connect() as conn:
-            conn.execute(text("ALTER TABLE user DROP COLUMN is_mining"))
-            conn.commit()
-
-if __name__ == "__main__":
-    upgrade() 
\ No newline at end of file
+def downgrade(conn):
+    # Remove is_mining column from User table
+    drop_columns(conn, 'user', ['is_mining'])
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer
+from migrations.util import add_columns, drop_columns
+
+def upgrade(conn):
+    # Revision counter behind the status ETags
+    add_columns(conn, 'user', [Column('state_revision', Integer, nullable=False, server_default='0')])
+
+def downgrade(conn):
+    drop_columns(conn, 'user', ['state_revision'])
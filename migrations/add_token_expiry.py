@@ -0,0 +1,9 @@
+from sqlalchemy import Column, DateTime
+from migrations.util import add_columns, drop_columns
+
+def upgrade(conn):
+    # Locally tracked Aveum token lifetime
+    add_columns(conn, 'user', [Column('token_issued_at', DateTime), Column('token_expires_at', DateTime)])
+
+def downgrade(conn):
+    drop_columns(conn, 'user', ['token_issued_at', 'token_expires_at'])
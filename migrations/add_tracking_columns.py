@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Boolean, DateTime, Float, Integer, false
+from migrations.util import add_columns, drop_columns
+
+def columns():
+    return [
+        Column('mining_start_time', DateTime),
+        Column('mining_end_time', DateTime),
+        Column('mining_sessions_completed', Integer, server_default='0'),
+        Column('last_like_time', DateTime),
+        Column('daily_likes', Integer, server_default='0'),
+        Column('daily_rewards', Float, server_default='0'),
+        Column('last_reward_claim_time', DateTime),
+        Column('mining_errors', Integer, server_default='0'),
+        Column('like_errors', Integer, server_default='0'),
+        Column('is_banned', Boolean, server_default=false()),
+        Column('last_ban_check_time', DateTime)
+    ]
+
+def upgrade(conn):
+    # Mining, auto-like and ban tracking columns on User
+    add_columns(conn, 'user', columns())
+
+def downgrade(conn):
+    drop_columns(conn, 'user', [column.name for column in columns()])
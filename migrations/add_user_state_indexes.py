@@ -0,0 +1,22 @@
+from sqlalchemy import MetaData, Table, Column, Index, Integer, Boolean
+from migrations.util import create_indexes, drop_indexes
+
+# The schema as of this step, independent of later changes to models.py
+user = Table('user', MetaData(),
+             Column('id', Integer, primary_key=True),
+             Column('mining_active', Boolean),
+             Column('auto_like_active', Boolean),
+             Column('is_mining', Boolean))
+
+indexes = [
+    Index('ix_user_mining_active', user.c.mining_active),
+    Index('ix_user_auto_like_active', user.c.auto_like_active),
+    Index('ix_user_is_mining', user.c.is_mining)
+]
+
+def upgrade(conn):
+    # Flags the worker's job queries and the admin overview filter by
+    create_indexes(conn, indexes)
+
+def downgrade(conn):
+    drop_indexes(conn, indexes)
@@ -0,0 +1,21 @@
+from sqlalchemy import MetaData, Table, Column, Index, ForeignKey, Integer, String, Text, DateTime
+from migrations.util import create_tables
+
+# The schema as of this step, independent of later changes to models.py
+metadata = MetaData()
+Table('user', metadata, Column('id', Integer, primary_key=True))
+activity_event = Table('activity_event', metadata,
+                       Column('id', Integer, primary_key=True),
+                       Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+                       Column('timestamp', DateTime, nullable=False),
+                       Column('kind', String(20), nullable=False),
+                       Column('message', Text, nullable=False),
+                       Index('ix_activity_event_user_id_id', 'user_id', 'id'),
+                       Index('ix_activity_event_timestamp', 'timestamp'))
+
+def upgrade(conn):
+    # Activity log rows replacing the User.last_activity_log text blob
+    create_tables(conn, [activity_event])
+
+def downgrade(conn):
+    activity_event.drop(conn, checkfirst=True)
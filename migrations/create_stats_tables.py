@@ -0,0 +1,31 @@
+from sqlalchemy import MetaData, Table, Column, Index, ForeignKey, PrimaryKeyConstraint, Integer, Float, DateTime
+from migrations.util import create_tables
+
+# The schema as of this step, independent of later changes to models.py
+metadata = MetaData()
+Table('user', metadata, Column('id', Integer, primary_key=True))
+
+def bucket_table(name):
+    return Table(name, metadata,
+                 Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+                 Column('bucket_start', DateTime, nullable=False),
+                 Column('likes', Integer, nullable=False, server_default='0'),
+                 Column('like_errors', Integer, nullable=False, server_default='0'),
+                 Column('sessions_completed', Integer, nullable=False, server_default='0'),
+                 Column('mining_errors', Integer, nullable=False, server_default='0'),
+                 Column('rewards', Float, nullable=False, server_default='0'),
+                 Column('earnings', Float, nullable=False, server_default='0'),
+                 Column('last_earning', Float),
+                 PrimaryKeyConstraint('user_id', 'bucket_start'),
+                 Index(f'ix_{name}_bucket_start', 'bucket_start'))
+
+stats_hourly = bucket_table('stats_hourly')
+stats_daily = bucket_table('stats_daily')
+
+def upgrade(conn):
+    # Hourly and daily per-user stats rollups
+    create_tables(conn, [stats_hourly, stats_daily])
+
+def downgrade(conn):
+    stats_daily.drop(conn, checkfirst=True)
+    stats_hourly.drop(conn, checkfirst=True)
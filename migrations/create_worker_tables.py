@@ -0,0 +1,20 @@
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime
+from migrations.util import create_tables
+
+# The schema as of this step, independent of later changes to models.py
+metadata = MetaData()
+worker_lease = Table('worker_lease', metadata,
+                     Column('shard', Integer, primary_key=True, autoincrement=False),
+                     Column('owner', String(100)),
+                     Column('expires_at', DateTime))
+worker_node = Table('worker_node', metadata,
+                    Column('owner', String(100), primary_key=True),
+                    Column('expires_at', DateTime, nullable=False))
+
+def upgrade(conn):
+    # Shard leases and heartbeats for the background worker service
+    create_tables(conn, [worker_lease, worker_node])
+
+def downgrade(conn):
+    worker_node.drop(conn, checkfirst=True)
+    worker_lease.drop(conn, checkfirst=True)
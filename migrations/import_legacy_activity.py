@@ -0,0 +1,54 @@
+import re
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime, select, exists
+
+# Lines the old code prepended to User.last_activity_log, newest first
+LEGACY_LINE = re.compile(r'^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] (.*)$')
+
+metadata = MetaData()
+user = Table('user', metadata,
+             Column('id', Integer, primary_key=True),
+             Column('last_activity_log', Text))
+activity_event = Table('activity_event', metadata,
+                       Column('id', Integer, primary_key=True),
+                       Column('user_id', Integer),
+                       Column('timestamp', DateTime),
+                       Column('kind', String(20)),
+                       Column('message', Text))
+
+def parse_legacy_log(text):
+    """(timestamp, message) pairs from the old log text, oldest first"""
+    # Parsed newest first, as written, then reversed
+    entries = []
+    for line in (text or '').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = LEGACY_LINE.match(line)
+        if match:
+            entries.append((datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S'), match.group(2)))
+        elif entries:
+            # A line without a stamp belongs to the entry above it
+            timestamp, message = entries[-1]
+            entries[-1] = (timestamp, f"{message}\n{line}")
+        else:
+            entries.append((None, line))
+    entries.reverse()
+    return entries
+
+def upgrade(conn):
+    # Carry the old text log over for users that have no events yet
+    has_events = exists().where(activity_event.c.user_id == user.c.id)
+    rows = conn.execute(select(user.c.id, user.c.last_activity_log)
+                        .where(user.c.last_activity_log != None, user.c.last_activity_log != '', ~has_events))
+    for user_id, text in rows.fetchall():
+        entries = parse_legacy_log(text)
+        fallback = next((timestamp for timestamp, _ in entries if timestamp), datetime.now())
+        if entries:
+            conn.execute(activity_event.insert(), [
+                {'user_id': user_id, 'timestamp': timestamp or fallback, 'kind': 'legacy', 'message': message}
+                for timestamp, message in entries
+            ])
+
+def downgrade(conn):
+    conn.execute(activity_event.delete().where(activity_event.c.kind == 'legacy'))
@@ -0,0 +1,39 @@
+from sqlalchemy import MetaData, Table, inspect
+from sqlalchemy.schema import CreateColumn
+
+def _quote(conn, name):
+    # `user` is a reserved word on PostgreSQL
+    return conn.dialect.identifier_preparer.quote(name)
+
+def add_columns(conn, table, columns):
+    """Add each Column that `table` does not have yet.
+
+    Defaults must be given as server_default so existing rows get a value.
+    Columns are checked up front, so a half-migrated legacy database is
+    completed instead of failing on the first column it already has.
+    """
+    existing = {column['name'] for column in inspect(conn).get_columns(table)}
+    Table(table, MetaData(), *columns)
+    for column in columns:
+        if column.name in existing:
+            continue
+        spec = CreateColumn(column).compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f"ALTER TABLE {_quote(conn, table)} ADD COLUMN {spec}")
+
+def drop_columns(conn, table, names):
+    existing = {column['name'] for column in inspect(conn).get_columns(table)}
+    for name in names:
+        if name in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {_quote(conn, table)} DROP COLUMN {_quote(conn, name)}")
+
+def create_tables(conn, tables):
+    for table in tables:
+        table.create(conn, checkfirst=True)
+
+def create_indexes(conn, indexes):
+    for index in indexes:
+        index.create(conn, checkfirst=True)
+
+def drop_indexes(conn, indexes):
+    for index in indexes:
+        index.drop(conn, checkfirst=True)
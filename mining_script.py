@@ -1,44 +1,51 @@
 import time
-import requests
 from datetime import datetime
-from app import app, db
-from models import User
+from sqlalchemy import func
+from models import db, User
+from factory import db_context
+import stats
+
+# Reward added per tick and seconds between ticks
+MINING_REWARD = 0.001
+MINING_INTERVAL = 60
 
 def update_mining_status(user_id, is_mining):
-    with app.app_context():
+    with db_context():
         user = User.query.get(user_id)
         if user:
             user.is_mining = is_mining
             db.session.commit()
 
-def mine_rewards(user_id):
-    with app.app_context():
-        user = User.query.get(user_id)
-        if not user or not user.is_mining:
-            return
-
-        # Simulate mining process
-        while user.is_mining:
-            try:
-                # Add mining reward (example: 0.001 per cycle)
-                reward = 0.001
-                user.balance = float(user.balance or 0) + reward
-                user.total_rewards = float(user.total_rewards or 0) + reward
-                db.session.commit()
-
-                # Log the mining activity
-                print(f"[{datetime.now()}] User {user.email} mined {reward} coins")
+def mine_rewards_tick(user_filter=None, reward=MINING_REWARD):
+    """Credit one mining reward to every user that is currently mining.
 
-                # Wait for 1 minute before next mining cycle
-                time.sleep(60)
+    A single set-based UPDATE covers all mining users, and because it checks
+    is_mining at execution time a stopped user is never credited again.
+    `user_filter` optionally restricts the update (e.g. to a worker's shards).
+    The reward is added to the stats rollups in the same transaction.
+    Returns the number of users credited.
+    """
+    where = User.is_mining == True
+    if user_filter is not None:
+        where = db.and_(where, user_filter)
+    credited = User.query.filter(where).update({
+        User.balance: func.coalesce(User.balance, 0) + reward,
+        User.total_rewards: func.coalesce(User.total_rewards, 0) + reward,
+        User.state_revision: User.state_revision + 1
+    }, synchronize_session=False)
+    if credited:
+        stats.record_for_query('rewards', reward, where)
+    db.session.commit()
+    return credited
 
+if __name__ == "__main__":
+    # Run the mining tick in the foreground for all users
+    with db_context():
+        while True:
+            try:
+                credited = mine_rewards_tick()
+                print(f"[{datetime.now()}] Credited {MINING_REWARD} coins to {credited} mining users")
             except Exception as e:
+                db.session.rollback()
                 print(f"Error during mining: {str(e)}")
-                time.sleep(5)  # Wait before retrying
-
-if __name__ == "__main__":
-    # This script can be run as a separate process for each user
-    import sys
-    if len(sys.argv) > 1:
-        user_id = int(sys.argv[1])
-        mine_rewards(user_id) 
\ No newline at end of file
+            time.sleep(MINING_INTERVAL)
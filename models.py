@@ -1,37 +1,152 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.ext.declarative import declared_attr
 from datetime import datetime
+import asyncio
+import threading
 
-db = SQLAlchemy()
+def session_scope():
+    """Give each asyncio task its own session, otherwise one per thread.
+
+    Background checks for many users run as concurrent tasks on a single
+    thread, and must not share (and commit or roll back) one session.
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return ('task', id(task))
+    return ('thread', threading.get_ident())
+
+db = SQLAlchemy(session_options={'scopefunc': session_scope})
 
 class User(UserMixin, db.Model):
+    # Large or rarely read columns are deferred and load on first access,
+    # one group at a time, so routine per-request loads stay small
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password = db.Column(db.String(120), nullable=False)
-    aveum_email = db.Column(db.String(120))
-    aveum_password = db.Column(db.String(120))
-    aveum_token = db.Column(db.String(500))
+    password = db.deferred(db.Column(db.String(120), nullable=False), group='secrets')
+    aveum_email = db.deferred(db.Column(db.String(120)), group='credentials')
+    aveum_password = db.deferred(db.Column(db.String(120)), group='secrets')
+    aveum_token = db.deferred(db.Column(db.String(500)), group='credentials')
     device_id = db.Column(db.String(50))
     device_model = db.Column(db.String(50))
     platform_version = db.Column(db.String(10))
-    mining_active = db.Column(db.Boolean, default=False)
-    auto_like_active = db.Column(db.Boolean, default=False)
+    # Indexed for the worker's job queries and the admin overview
+    mining_active = db.Column(db.Boolean, default=False, index=True)
+    auto_like_active = db.Column(db.Boolean, default=False, index=True)
     last_mining_time = db.Column(db.DateTime)
     total_likes = db.Column(db.Integer, default=0)
     total_rewards = db.Column(db.Float, default=0.0)
     balance = db.Column(db.Float, default=0.0)
     last_login_time = db.Column(db.DateTime)
-    last_activity_log = db.Column(db.Text)
-    is_mining = db.Column(db.Boolean, default=False)
+    # Legacy activity log, superseded by ActivityEvent
+    last_activity_log = db.deferred(db.Column(db.Text))
+    is_mining = db.Column(db.Boolean, default=False, index=True)
     # New fields for enhanced tracking
     mining_start_time = db.Column(db.DateTime)
     mining_end_time = db.Column(db.DateTime)
     mining_sessions_completed = db.Column(db.Integer, default=0)
     last_like_time = db.Column(db.DateTime)
+    # Legacy running totals that were never reset; daily figures now come from DailyStats
     daily_likes = db.Column(db.Integer, default=0)
     daily_rewards = db.Column(db.Float, default=0.0)
     last_reward_claim_time = db.Column(db.DateTime)
     mining_errors = db.Column(db.Integer, default=0)
     like_errors = db.Column(db.Integer, default=0)
     is_banned = db.Column(db.Boolean, default=False)
-    last_ban_check_time = db.Column(db.DateTime)
\ No newline at end of file
+    last_ban_check_time = db.Column(db.DateTime)
+    token_issued_at = db.Column(db.DateTime)
+    token_expires_at = db.Column(db.DateTime)
+    # Bumped on every change to the row, used as a cheap version stamp for ETags
+    state_revision = db.Column(db.Integer, default=0, nullable=False)
+
+class ActivityEvent(db.Model):
+    __tablename__ = 'activity_event'
+    __table_args__ = (
+        # Reads are always "one user's events around a cursor", so the
+        # (user_id, id) index turns every page into a bounded range scan
+        db.Index('ix_activity_event_user_id_id', 'user_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+    kind = db.Column(db.String(20), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+
+    def format(self):
+        return f"[{self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {self.message}"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'kind': self.kind,
+            'message': self.message
+        }
+
+class WorkerLease(db.Model):
+    """Ownership of one user shard by a worker process until `expires_at`"""
+    __tablename__ = 'worker_lease'
+
+    shard = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    owner = db.Column(db.String(100))
+    expires_at = db.Column(db.DateTime)
+
+class WorkerNode(db.Model):
+    """Heartbeat of a live worker process, used to split shards fairly"""
+    __tablename__ = 'worker_node'
+
+    owner = db.Column(db.String(100), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class StatsBucketMixin:
+    """Per-user counters for one time bucket, added to as events happen"""
+    @declared_attr
+    def user_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    likes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    like_errors = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    sessions_completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    mining_errors = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Simulated mining credits and Aveum hub earnings claimed in the bucket
+    rewards = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    earnings = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    # Last currentEarning reported by the hub during the bucket
+    last_earning = db.Column(db.Float)
+
+    def to_dict(self):
+        return {
+            'start': self.bucket_start.isoformat(),
+            'likes': self.likes,
+            'like_errors': self.like_errors,
+            'sessions_completed': self.sessions_completed,
+            'mining_errors': self.mining_errors,
+            'rewards': self.rewards,
+            'earnings': self.earnings,
+            'last_earning': self.last_earning
+        }
+
+    @declared_attr
+    def __table_args__(cls):
+        # Key on user first for history reads; the time index serves pruning
+        return (db.PrimaryKeyConstraint('user_id', 'bucket_start'),
+                db.Index(f'ix_{cls.__tablename__}_bucket_start', 'bucket_start'))
+
+class HourlyStats(StatsBucketMixin, db.Model):
+    __tablename__ = 'stats_hourly'
+
+class DailyStats(StatsBucketMixin, db.Model):
+    __tablename__ = 'stats_daily'
+
+class SchemaVersion(db.Model):
+    """One row per applied migration; the highest version is the schema's"""
+    __tablename__ = 'schema_version'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
@@ -1,5 +1,5 @@
-from migrations.add_balance_column import upgrade
+from migrate import main
 
 if __name__ == '__main__':
-    upgrade()
+    main()
     print("Balance column migration completed successfully!") 
\ No newline at end of file
@@ -1,6 +1,6 @@
-from migrations.add_is_mining_column import upgrade
+from migrate import main
 
 if __name__ == "__main__":
-    print("Running database migration to add is_mining column...")
-    upgrade()
+    print("Running database migrations...")
+    main()
     print("Migration completed successfully!") 
\ No newline at end of file
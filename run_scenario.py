@@ -0,0 +1,127 @@
+"""
+Background engine scenario runner
+
+Starts fake_aveum_server.py in-process, points the app at it and a
+throwaway SQLite database, creates N simulated accounts and runs the
+worker service against them for a fixed time. Then it reports upstream
+throughput, claim latency after hub session expiry and database write
+counts:
+
+    python run_scenario.py --users 50 --duration 120 --session-length 30
+"""
+
+import os
+import sys
+import json
+import socket
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def parse_args():
+    import fake_aveum_server
+    parser = argparse.ArgumentParser(description='Run the background engines against a fake Aveum API')
+    parser.add_argument('--users', type=int, default=20, help='Number of simulated accounts')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run the worker')
+    parser.add_argument('--auto-like', action='store_true', help='Also run auto-like for every account')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    fake_aveum_server.add_arguments(parser)
+    return parser.parse_args()
+
+async def run(args, port, database_path):
+    # Imported here so the environment set in main() is seen at import time
+    from sqlalchemy import event
+    import fake_aveum_server
+    import worker
+    from models import db, User
+    from migrate import run_migrations
+    from factory import db_context
+
+    fake = fake_aveum_server.from_arguments(args)
+    runner = await fake.start(port=port)
+
+    writes = {'statements': 0, 'commits': 0}
+    with db_context():
+        run_migrations()
+        expires_at = datetime.now() + timedelta(seconds=fake.token_ttl)
+        for i in range(args.users):
+            # Seed a live token like a logged-in account; auto-like turns
+            # itself off for users that have none
+            db.session.add(User(
+                email=f"sim{i}@example.com",
+                password='sim',
+                aveum_email=f"sim{i}@example.com",
+                aveum_password='sim',
+                aveum_token=fake_aveum_server.make_token(f"sim{i}@example.com", fake.token_ttl),
+                token_expires_at=expires_at,
+                mining_active=True,
+                auto_like_active=args.auto_like
+            ))
+        db.session.commit()
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().split(' ', 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+                writes['statements'] += 1
+
+        @event.listens_for(db.engine, 'commit')
+        def count_commit(conn):
+            writes['commits'] += 1
+
+    service = worker.Worker(sync_interval=1)
+    task = asyncio.ensure_future(service.run())
+    await asyncio.sleep(args.duration)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await runner.cleanup()
+
+    report = fake.stats_snapshot()
+    report.update({
+        'users': args.users,
+        'duration_seconds': args.duration,
+        'db_write_statements': writes['statements'],
+        'db_commits': writes['commits'],
+        'db_writes_per_user_minute': writes['statements'] / args.users / (args.duration / 60) if args.users else 0,
+        'scheduler': service.mining_scheduler.stats(),
+        'database': database_path
+    })
+    return report
+
+def main():
+    # Set up the environment before anything imports aveum_api or app
+    port = free_port()
+    database_path = os.path.join(tempfile.mkdtemp(prefix='aveum-scenario-'), 'scenario.db')
+    os.environ['DATABASE_URL'] = f"sqlite:///{database_path}"
+    os.environ['AVEUM_API_BASE_URL'] = f"http://127.0.0.1:{port}"
+    args = parse_args()
+
+    report = asyncio.run(run(args, port, database_path))
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, default=str)
+        print()
+        return
+
+    print("=" * 50)
+    print("Scenario report")
+    print("=" * 50)
+    print(f"Users: {report['users']}  Duration: {report['duration_seconds']}s")
+    print(f"Upstream requests: {report['total_requests']} ({report['requests_per_second']:.1f}/s)")
+    for name, count in sorted(report['requests'].items()):
+        print(f"  {name}: {count} ({report['errors'].get(name, 0)} errors)")
+    print(f"Claims: {report['claims']}")
+    if report['claims']:
+        print(f"Claim latency after expiry: avg {report['claim_latency_avg']:.2f}s, "
+              f"p95 {report['claim_latency_p95']:.2f}s, max {report['claim_latency_max']:.2f}s")
+    print(f"DB write statements: {report['db_write_statements']}  commits: {report['db_commits']} "
+          f"({report['db_writes_per_user_minute']:.1f} writes per user-minute)")
+    print(f"Scheduler: {report['scheduler']}")
+
+if __name__ == '__main__':
+    main()
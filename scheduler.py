@@ -0,0 +1,171 @@
+import time
+import heapq
+import asyncio
+import itertools
+import metrics
+
+class DeadlineScheduler:
+    """Run a per-user check when each user's next deadline comes due.
+
+    `check(user_id)` is awaited for every due user and returns the number of
+    seconds until that user should be checked again, or None to drop the
+    user. `list_user_ids()` is called every `rescan_interval` seconds to pick
+    up users that became active since the last scan.
+
+    At most `max_concurrency` checks run at once and each one is cancelled
+    after `check_timeout` seconds, so a slow account cannot hold up others.
+    cancel() drops a user at once, cancelling a check that is in progress.
+    """
+
+    def __init__(self, check, list_user_ids, max_concurrency=10, check_timeout=60,
+                 rescan_interval=60, retry_delay=30, name='scheduler'):
+        self.check = check
+        self.list_user_ids = list_user_ids
+        self.max_concurrency = max_concurrency
+        self.check_timeout = check_timeout
+        self.rescan_interval = rescan_interval
+        self.retry_delay = retry_delay
+        self.name = name
+
+        self._heap = []
+        self._due = {}
+        self._running = {}
+        self._counter = itertools.count()
+        self._wakeup = None
+        self._semaphore = None
+
+        # Counters reported by stats()
+        self.checks_completed = 0
+        self.check_errors = 0
+        self.check_timeouts = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+    def schedule(self, user_id, delay=0):
+        """Check `user_id` after `delay` seconds, replacing any earlier deadline"""
+        due = time.monotonic() + max(0, delay)
+        self._due[user_id] = due
+        heapq.heappush(self._heap, (due, next(self._counter), user_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def unschedule(self, user_id):
+        self._due.pop(user_id, None)
+
+    def ensure(self, user_id):
+        """Check `user_id` now unless it is already queued or running"""
+        if user_id not in self._due and user_id not in self._running:
+            self.schedule(user_id)
+
+    def cancel(self, user_id):
+        """Drop `user_id`, cancelling its running check. Returns whether it was known."""
+        queued = self._due.pop(user_id, None) is not None
+        task = self._running.pop(user_id, None)
+        if task is not None:
+            task.cancel()
+        return queued or task is not None
+
+    def users(self):
+        return set(self._due) | set(self._running)
+
+    async def drain(self):
+        """Cancel every running check and wait for them to exit"""
+        self._due.clear()
+        tasks = list(self._running.values())
+        self._running.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _rescan(self):
+        for user_id in self.list_user_ids():
+            self.ensure(user_id)
+
+    def _pop_due(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            due, _, user_id = heapq.heappop(self._heap)
+            # Skip entries superseded by a later schedule() call
+            if self._due.get(user_id) != due:
+                continue
+            del self._due[user_id]
+            yield user_id, due
+
+    async def _run_check(self, user_id, due):
+        async with self._semaphore:
+            lag = time.monotonic() - due
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._total_lag += lag
+            metrics.scheduler_lag.observe(lag, scheduler=self.name)
+
+            delay = self.retry_delay
+            outcome = 'success'
+            started = time.monotonic()
+            try:
+                delay = await asyncio.wait_for(self.check(user_id), self.check_timeout)
+            except asyncio.CancelledError:
+                outcome = 'cancelled'
+                raise
+            except asyncio.TimeoutError:
+                self.check_timeouts += 1
+                outcome = 'timeout'
+                print(f"{self.name}: check for user {user_id} timed out after {self.check_timeout}s")
+            except Exception as error:
+                self.check_errors += 1
+                outcome = 'error'
+                print(f"{self.name}: error checking user {user_id}: {str(error)}")
+            finally:
+                self.checks_completed += 1
+                if self._running.get(user_id) is asyncio.current_task():
+                    del self._running[user_id]
+                metrics.scheduler_check_duration.observe(time.monotonic() - started, scheduler=self.name)
+                metrics.scheduler_checks.inc(scheduler=self.name, outcome=outcome)
+
+            if delay is not None and user_id not in self._due:
+                self.schedule(user_id, delay)
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        next_rescan = 0
+
+        while True:
+            now = time.monotonic()
+            if now >= next_rescan:
+                try:
+                    self._rescan()
+                except Exception as error:
+                    print(f"{self.name}: error listing users: {str(error)}")
+                next_rescan = now + self.rescan_interval
+
+            for user_id, due in self._pop_due(now):
+                self._running[user_id] = asyncio.ensure_future(self._run_check(user_id, due))
+
+            # Sleep until the earliest deadline, the next rescan or a schedule() call
+            timeout = next_rescan - now
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - now)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def collect_metrics(self):
+        """Refresh the queued/running gauges; registered as a metrics collector"""
+        metrics.scheduler_users.set(len(self._due), scheduler=self.name, state='queued')
+        metrics.scheduler_users.set(len(self._running), scheduler=self.name, state='running')
+
+    def stats(self):
+        started = self.checks_completed + len(self._running)
+        return {
+            'queued': len(self._due),
+            'running': len(self._running),
+            'checks_completed': self.checks_completed,
+            'check_errors': self.check_errors,
+            'check_timeouts': self.check_timeouts,
+            'last_lag_seconds': self.last_lag,
+            'max_lag_seconds': self.max_lag,
+            'avg_lag_seconds': self._total_lag / started if started else 0.0
+        }
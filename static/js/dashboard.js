@@ -64,6 +64,62 @@ function createToastContainer() {
     return container;
 }
 
+// Render status fields; works with a full status payload or a partial delta
+function renderStatus(data) {
+    const setText = (id, value) => {
+        const element = document.getElementById(id);
+        if (element) element.textContent = value;
+    };
+    
+    // Update account status
+    if ('aveum_email' in data) setText('aveum-email', data.aveum_email || 'Not set');
+    if ('login_status' in data) updateStatusBadge('login-status', data.login_status ? 'Logged In' : 'Not Logged In', data.login_status);
+    if ('device_id' in data) setText('device-id', data.device_id || 'Not set');
+    if ('device_model' in data) setText('device-model', data.device_model || 'Not set');
+    if ('platform_version' in data) setText('platform-version', data.platform_version || 'Not set');
+    
+    // Update mode
+    if ('mining_active' in data) updateStatusBadge('current-mode', data.mining_active ? 'Mining' : 'Auto-Like', true);
+    
+    // Update mining status
+    if ('is_mining' in data) updateStatusBadge('mining-status', data.is_mining ? 'Active' : 'Inactive', data.is_mining);
+    if ('current_balance' in data) setText('current-balance', formatNumber(data.current_balance));
+    if ('total_rewards' in data) setText('total-rewards', formatNumber(data.total_rewards));
+    if ('mining_sessions_completed' in data) setText('mining-sessions', formatNumber(data.mining_sessions_completed));
+    if ('mining_errors' in data) setText('mining-errors', formatNumber(data.mining_errors));
+    
+    // Update auto-like status
+    if ('auto_like_active' in data) updateStatusBadge('auto-like-status', data.auto_like_active ? 'Active' : 'Inactive', data.auto_like_active);
+    if ('total_likes' in data) setText('total-likes', formatNumber(data.total_likes));
+    if ('daily_likes' in data) setText('daily-likes', formatNumber(data.daily_likes));
+    if ('like_errors' in data) setText('like-errors', formatNumber(data.like_errors));
+    
+    // Update ban status
+    if ('is_banned' in data) updateStatusBadge('ban-status', data.is_banned ? 'Banned' : 'Not Banned', !data.is_banned);
+    if ('last_ban_check_time' in data) setText('last-ban-check', formatDateTime(data.last_ban_check_time));
+    
+    // Update activity log
+    const activityLog = document.getElementById('activity-log');
+    if (activityLog && data.last_activity) {
+        activityLog.textContent = data.last_activity;
+        activityLog.scrollTop = activityLog.scrollHeight;
+    }
+    
+    // Update button states
+    const startMiningBtn = document.getElementById('start-mining');
+    const stopMiningBtn = document.getElementById('stop-mining');
+    const toggleAutoLikeBtn = document.getElementById('toggle-auto-like');
+    
+    if ('is_mining' in data) {
+        if (startMiningBtn) startMiningBtn.disabled = data.is_mining;
+        if (stopMiningBtn) stopMiningBtn.disabled = !data.is_mining;
+    }
+    if ('mining_active' in data && toggleAutoLikeBtn) toggleAutoLikeBtn.disabled = data.mining_active;
+}
+
+// Newest activity entry shown, used to resume the event stream
+let lastActivityId = null;
+
 // Update dashboard data
 async function updateDashboard() {
     try {
@@ -78,54 +134,61 @@ async function updateDashboard() {
             return;
         }
         
-        // Update account status
-        document.getElementById('aveum-email').textContent = data.aveum_email || 'Not set';
-        updateStatusBadge('login-status', data.login_status ? 'Logged In' : 'Not Logged In', data.login_status);
-        document.getElementById('device-id').textContent = data.device_id || 'Not set';
-        document.getElementById('device-model').textContent = data.device_model || 'Not set';
-        document.getElementById('platform-version').textContent = data.platform_version || 'Not set';
-        
-        // Update mode
-        updateStatusBadge('current-mode', data.mining_active ? 'Mining' : 'Auto-Like', true);
-        
-        // Update mining status
-        updateStatusBadge('mining-status', data.is_mining ? 'Active' : 'Inactive', data.is_mining);
-        document.getElementById('current-balance').textContent = formatNumber(data.current_balance);
-        document.getElementById('total-rewards').textContent = formatNumber(data.total_rewards);
-        document.getElementById('mining-sessions').textContent = formatNumber(data.mining_sessions_completed);
-        document.getElementById('mining-errors').textContent = formatNumber(data.mining_errors);
-        
-        // Update auto-like status
-        updateStatusBadge('auto-like-status', data.auto_like_active ? 'Active' : 'Inactive', data.auto_like_active);
-        document.getElementById('total-likes').textContent = formatNumber(data.total_likes);
-        document.getElementById('daily-likes').textContent = formatNumber(data.daily_likes);
-        document.getElementById('like-errors').textContent = formatNumber(data.like_errors);
-        
-        // Update ban status
-        updateStatusBadge('ban-status', data.is_banned ? 'Banned' : 'Not Banned', !data.is_banned);
-        document.getElementById('last-ban-check').textContent = formatDateTime(data.last_ban_check_time);
-        
-        // Update activity log
-        const activityLog = document.getElementById('activity-log');
-        if (activityLog && data.last_activity) {
-            activityLog.textContent = data.last_activity;
-            activityLog.scrollTop = activityLog.scrollHeight;
-        }
-        
-        // Update button states
-        const startMiningBtn = document.getElementById('start-mining');
-        const stopMiningBtn = document.getElementById('stop-mining');
-        const toggleAutoLikeBtn = document.getElementById('toggle-auto-like');
-        
-        if (startMiningBtn) startMiningBtn.disabled = data.is_mining;
-        if (stopMiningBtn) stopMiningBtn.disabled = !data.is_mining;
-        if (toggleAutoLikeBtn) toggleAutoLikeBtn.disabled = data.mining_active;
+        if (data.last_activity_id !== undefined) lastActivityId = data.last_activity_id;
+        renderStatus(data);
         
     } catch (error) {
         console.error('Error updating dashboard:', error);
     }
 }
 
+// Add a streamed activity entry to the top of the log
+function prependActivity(entry) {
+    const activityLog = document.getElementById('activity-log');
+    if (!activityLog) return;
+    
+    const line = `[${entry.timestamp}] ${entry.message}`;
+    const current = activityLog.textContent.trim();
+    const isPlaceholder = !current || current.startsWith('No activity') || current.startsWith('Loading');
+    activityLog.textContent = isPlaceholder ? line : line + '\n' + current;
+    lastActivityId = entry.id;
+}
+
+// Fall back to polling every 5 seconds
+let pollTimer = null;
+
+function startPolling() {
+    if (pollTimer === null) {
+        pollTimer = setInterval(updateDashboard, 5000);
+    }
+}
+
+// Receive status deltas and new activity over Server-Sent Events
+function startEventStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    
+    const url = lastActivityId !== null ? `/api/events?after=${lastActivityId}` : '/api/events';
+    const source = new EventSource(url);
+    
+    source.addEventListener('status', (event) => {
+        renderStatus(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('activity', (event) => {
+        prependActivity(JSON.parse(event.data));
+    });
+    
+    source.onerror = () => {
+        // The browser reconnects on its own unless the stream was refused
+        if (source.readyState === EventSource.CLOSED) {
+            startPolling();
+        }
+    };
+}
+
 // Button click handlers
 document.addEventListener('DOMContentLoaded', function() {
     // Refresh token
@@ -248,7 +311,6 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    // Initial update and periodic refresh
-    updateDashboard();
-    setInterval(updateDashboard, 5000);
+    // Initial update, then live updates (polling if streaming is unavailable)
+    updateDashboard().then(startEventStream);
 }); 
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Per-user stats rollups in hourly and daily buckets.
+
+Events add to the bucket they happen in rather than being counted later
+from logs. Every write goes to both tables: hourly rows give recent charts
+their detail, and daily rows are the downsampled copy kept long after the
+hourly rows are pruned. Reads for charts and daily figures only touch a
+handful of precomputed rows.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from models import db, User, HourlyStats, DailyStats
+
+# How long each resolution is kept before prune_stats() removes it
+HOURLY_RETENTION_DAYS = 14
+DAILY_RETENTION_DAYS = 400
+
+# Columns that events add to, and the last-value-wins gauge
+COUNTERS = ('likes', 'like_errors', 'sessions_completed', 'mining_errors', 'rewards', 'earnings')
+GAUGES = ('last_earning',)
+
+# Named ranges for the history endpoint: (bucket model, bucket size, buckets shown)
+RANGES = {
+    '24h': (HourlyStats, timedelta(hours=1), 24),
+    '7d': (HourlyStats, timedelta(hours=1), 24 * 7),
+    '30d': (DailyStats, timedelta(days=1), 30),
+    '90d': (DailyStats, timedelta(days=1), 90),
+    '365d': (DailyStats, timedelta(days=1), 365)
+}
+DEFAULT_RANGE = '24h'
+
+def hour_start(when=None):
+    return (when or datetime.now()).replace(minute=0, second=0, microsecond=0)
+
+def day_start(when=None):
+    return (when or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def bucket_start(model, when=None):
+    return hour_start(when) if model is HourlyStats else day_start(when)
+
+# INSERT constructs that can update the existing row, per dialect; other
+# databases are rejected by database.configure_database() at startup
+INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+    'mysql': mysql.insert,
+    'mariadb': mysql.insert
+}
+
+def _insert(table):
+    return INSERTS[db.engine.dialect.name](table)
+
+def _upsert(table, statement):
+    """Add to the existing row's counters instead of failing on its key"""
+    mysql_style = isinstance(statement, mysql.Insert)
+    excluded = statement.inserted if mysql_style else statement.excluded
+    values = {name: table.c[name] + excluded[name] for name in COUNTERS}
+    for name in GAUGES:
+        values[name] = func.coalesce(excluded[name], table.c[name])
+    if mysql_style:
+        return statement.on_duplicate_key_update(values)
+    return statement.on_conflict_do_update(index_elements=['user_id', 'bucket_start'], set_=values)
+
+def write_buckets(increments, gauges=None):
+    """Add a batch of changes to the hourly and daily rollups.
+
+    `increments` maps (user_id, hour) to {counter: amount} and `gauges`
+    maps (user_id, hour) to {gauge: value}. The rows are only executed on
+    the session; the caller commits them with its other changes.
+    """
+    gauges = gauges or {}
+    hourly = {}
+    for key in set(increments) | set(gauges):
+        row = {name: increments.get(key, {}).get(name, 0) for name in COUNTERS}
+        row.update({name: gauges.get(key, {}).get(name) for name in GAUGES})
+        hourly[key] = row
+    if not hourly:
+        return 0
+
+    # Downsample the hours into days; for gauges the latest hour wins
+    daily = {}
+    for (user_id, hour), row in sorted(hourly.items(), key=lambda item: item[0][1]):
+        day = daily.setdefault((user_id, day_start(hour)), dict.fromkeys(COUNTERS, 0))
+        for name in COUNTERS:
+            day[name] += row[name]
+        for name in GAUGES:
+            if row[name] is not None or name not in day:
+                day[name] = row[name]
+
+    for model, rows in ((HourlyStats, hourly), (DailyStats, daily)):
+        table = model.__table__
+        params = [dict(row, user_id=user_id, bucket_start=start) for (user_id, start), row in rows.items()]
+        db.session.execute(_upsert(table, _insert(table)), params)
+    return len(hourly)
+
+def record(user_id, when=None, **values):
+    """Add counters and set gauges for one user, e.g. record(1, earnings=2.5)"""
+    key = (user_id, hour_start(when))
+    increments = {name: value for name, value in values.items() if name in COUNTERS}
+    gauges = {name: value for name, value in values.items() if name in GAUGES}
+    unknown = set(values) - set(increments) - set(gauges)
+    if unknown:
+        raise ValueError(f"Unknown stats columns: {', '.join(sorted(unknown))}")
+    return write_buckets({key: increments}, {key: gauges})
+
+def record_for_query(column, amount, where, when=None):
+    """Add `amount` to `column` for every user matching `where`, set-based.
+
+    Used by bulk updates such as the mining tick, so crediting thousands of
+    users stays one INSERT ... SELECT per table instead of a row per user.
+    """
+    if column not in COUNTERS:
+        raise ValueError(f"Unknown stats counter: {column}")
+    for model in (HourlyStats, DailyStats):
+        table = model.__table__
+        users = select(User.id, db.literal(bucket_start(model, when)), db.literal(amount)).where(where)
+        statement = _insert(table).from_select(['user_id', 'bucket_start', column], users)
+        db.session.execute(_upsert(table, statement))
+
+def today(user_id):
+    """Today's daily bucket for a user, or None before anything happened"""
+    return DailyStats.query.get((user_id, day_start()))
+
+def history(user_id, range_name=DEFAULT_RANGE, now=None):
+    """Buckets for a named range, oldest first, plus their totals"""
+    model, step, count = RANGES[range_name]
+    end = bucket_start(model, now) + step
+    start = end - step * count
+    rows = (model.query
+            .filter(model.user_id == user_id, model.bucket_start >= start, model.bucket_start < end)
+            .order_by(model.bucket_start)
+            .all())
+    totals = {name: sum(getattr(row, name) for row in rows) for name in COUNTERS}
+    return {
+        'range': range_name,
+        'resolution': 'hour' if model is HourlyStats else 'day',
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'buckets': [row.to_dict() for row in rows],
+        'totals': totals
+    }
+
+def prune_stats(hourly_days=HOURLY_RETENTION_DAYS, daily_days=DAILY_RETENTION_DAYS):
+    """Delete buckets past their retention window. Returns rows removed."""
+    now = datetime.now()
+    removed = 0
+    for model, days in ((HourlyStats, hourly_days), (DailyStats, daily_days)):
+        cutoff = bucket_start(model, now - timedelta(days=days))
+        removed += (model.query
+                    .filter(model.bucket_start < cutoff)
+                    .delete(synchronize_session=False))
+    db.session.commit()
+    return removed
+
+class RollupBuffer:
+    """Pending stats changes keyed by (user_id, hour), for batching writers"""
+
+    def __init__(self):
+        self.increments = defaultdict(lambda: defaultdict(int))
+        self.gauges = defaultdict(dict)
+
+    def __bool__(self):
+        return bool(self.increments or self.gauges)
+
+    def users(self):
+        return {user_id for user_id, _ in list(self.increments) + list(self.gauges)}
+
+    def add(self, user_id, column, amount, when=None):
+        self.increments[(user_id, hour_start(when))][column] += amount
+
+    def set(self, user_id, column, value, when=None):
+        self.gauges[(user_id, hour_start(when))][column] = value
+
+    def merge(self, other):
+        """Fold an older buffer back in, keeping any newer gauge values"""
+        for key, counts in other.increments.items():
+            for column, amount in counts.items():
+                self.increments[key][column] += amount
+        for key, values in other.gauges.items():
+            for column, value in values.items():
+                self.gauges[key].setdefault(column, value)
+
+    def write(self):
+        return write_buckets(self.increments, self.gauges)
@@ -0,0 +1,102 @@
+import asyncio
+
+class TaskRegistry:
+    """Running per-user asyncio tasks keyed by (user_id, kind).
+
+    start() is idempotent: a key whose task is still running keeps it.
+    stop() cancels the task at once, and a start() for the same key right
+    after waits for the stopped task to finish unwinding, so two tasks
+    never run for one key. drain() stops everything and waits, for a clean
+    shutdown. `cleanup` runs in each task as it exits, e.g. to release the
+    task's database session.
+    """
+
+    def __init__(self, cleanup=None, name='tasks'):
+        self.cleanup = cleanup
+        self.name = name
+        self._tasks = {}
+        self._stopping = set()
+
+    def __contains__(self, key):
+        return self.running(key)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def keys(self, kind=None):
+        return [key for key in self._tasks if kind is None or key[1] == kind]
+
+    def running(self, key):
+        task = self._tasks.get(key)
+        return task is not None and not task.done() and task not in self._stopping
+
+    async def _run(self, key, factory, previous=None):
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            await factory()
+        except asyncio.CancelledError:
+            pass
+        except Exception as error:
+            print(f"{self.name}: task {key} failed: {str(error)}")
+        finally:
+            task = asyncio.current_task()
+            self._stopping.discard(task)
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+            if self.cleanup is not None:
+                self.cleanup()
+
+    def start(self, key, factory):
+        """Run `factory()` as the task for `key` unless one is already running"""
+        task = self._tasks.get(key)
+        if task is not None and not task.done() and task not in self._stopping:
+            return task
+        previous = task if task is not None and not task.done() else None
+        task = self._tasks[key] = asyncio.ensure_future(self._run(key, factory, previous))
+        return task
+
+    def stop(self, key):
+        """Cancel the task for `key`. Returns whether one was running."""
+        task = self._tasks.get(key)
+        if task is None or task.done() or task in self._stopping:
+            return False
+        self._stopping.add(task)
+        task.cancel()
+        return True
+
+    def stop_user(self, user_id):
+        return sum(self.stop(key) for key in list(self._tasks) if key[0] == user_id)
+
+    def sync(self, kind, user_ids, factory):
+        """Make the tasks of `kind` match `user_ids`, starting `factory(user_id)` where missing.
+
+        Returns the number of tasks started and stopped.
+        """
+        wanted = set(user_ids)
+        stopped = sum(self.stop(key) for key in self.keys(kind) if key[0] not in wanted)
+        started = 0
+        for user_id in wanted:
+            key = (user_id, kind)
+            if not self.running(key):
+                self.start(key, lambda user_id=user_id: factory(user_id))
+                started += 1
+        return started, stopped
+
+    async def drain(self, timeout=None):
+        """Cancel every task and wait for them to exit. Returns tasks still running."""
+        tasks = list(self._tasks.values())
+        for key in list(self._tasks):
+            self.stop(key)
+        if not tasks:
+            return 0
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        return len(pending)
+
+    def counts(self):
+        """Running tasks per kind, not counting ones still unwinding from stop()"""
+        counts = {}
+        for key in self._tasks:
+            if self.running(key):
+                counts[key[1]] = counts.get(key[1], 0) + 1
+        return counts
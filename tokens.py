@@ -0,0 +1,104 @@
+import json
+import base64
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from config import get_settings
+import aveum_api
+from api_models import LoginResult
+
+# Assumed token lifetime when the token does not carry an `exp` claim
+DEFAULT_TOKEN_LIFETIME = int(get_settings().get('AVEUM_TOKEN_LIFETIME', str(24 * 3600)))
+# Refresh tokens this many seconds before they expire
+REFRESH_MARGIN = int(get_settings().get('AVEUM_TOKEN_REFRESH_MARGIN', '600'))
+
+# HTTP statuses that mean the upstream rejected our token
+AUTH_FAILURE_STATUSES = (401, 403)
+
+def decode_token_expiry(token):
+    """Read the `exp` claim of a JWT locally, without verifying it"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return datetime.fromtimestamp(int(claims['exp']))
+    except Exception:
+        return None
+
+def is_auth_failure(result):
+    return result.status in AUTH_FAILURE_STATUSES
+
+class TokenManager:
+    """Tracks Aveum token expiry per user and refreshes tokens before they lapse.
+
+    Validity is judged locally from the recorded expiry, so no upstream call
+    is needed just to check a token. Concurrent refreshes for the same user
+    on one event loop share a single login.
+    """
+
+    def __init__(self, get_credentials, refresh_margin=REFRESH_MARGIN, default_lifetime=DEFAULT_TOKEN_LIFETIME):
+        self.get_credentials = get_credentials
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.default_lifetime = timedelta(seconds=default_lifetime)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def expires_at(self, user):
+        if not user.aveum_token:
+            return None
+        if user.token_expires_at:
+            return user.token_expires_at
+        return decode_token_expiry(user.aveum_token)
+
+    def needs_refresh(self, user):
+        expires_at = self.expires_at(user)
+        if expires_at is None:
+            # A token we know nothing about is trusted until it is rejected
+            return not user.aveum_token
+        return datetime.now() >= expires_at - self.refresh_margin
+
+    def record(self, user, login_result):
+        """Store a successful login's token, device info and expiry on the user"""
+        now = datetime.now()
+        user.aveum_token = login_result.token
+        user.device_id = login_result.device_id
+        user.device_model = login_result.device_model
+        user.platform_version = login_result.platform_version
+        user.token_issued_at = now
+        user.token_expires_at = decode_token_expiry(login_result.token) or now + self.default_lifetime
+
+    def invalidate(self, user):
+        """Mark the user's token as expired after the upstream rejected it"""
+        user.token_expires_at = datetime.now()
+
+    async def _login(self, email, password):
+        self.refreshes += 1
+        return await aveum_api.login(email, password)
+
+    async def refresh(self, user):
+        """Log in again and record the new token. Returns the login result."""
+        email, password = self.get_credentials(user)
+        if not email or not password:
+            return LoginResult.failure('No Aveum credentials available')
+
+        loop = asyncio.get_running_loop()
+        key = (loop, user.id)
+        with self._lock:
+            task = self._inflight.get(key)
+            if task is None:
+                task = loop.create_task(self._login(email, password))
+                self._inflight[key] = task
+                task.add_done_callback(lambda t: self._inflight.pop(key, None))
+
+        login_result = await asyncio.shield(task)
+        if login_result.success:
+            self.record(user, login_result)
+        return login_result
+
+    async def ensure_token(self, user):
+        """Return a usable token for the user, refreshing it first if due"""
+        if not self.needs_refresh(user):
+            return user.aveum_token
+        login_result = await self.refresh(user)
+        return login_result.token if login_result.success else None
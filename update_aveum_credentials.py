@@ -15,49 +15,15 @@ import os
 import sys
 import asyncio
 import getpass
-from flask import Flask
 from models import db, User
+from factory import db_context
+from config import ENV_PATH, save_env_credentials
+from jobs import token_manager
 import aveum_api
-from dotenv import load_dotenv
-
-# Create a temporary Flask app context
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///aveum.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-def save_env_credentials(email, password):
-    """Save Aveum credentials to .env file"""
-    env_path = os.path.join(os.getcwd(), '.env')
-    
-    # Read existing .env content
-    env_content = {}
-    if os.path.exists(env_path):
-        with open(env_path, 'r') as f:
-            for line in f:
-                if '=' in line:
-                    key, value = line.strip().split('=', 1)
-                    # Remove any existing quotes
-                    value = value.strip('"\'')
-                    env_content[key] = value
-    
-    # Update credentials
-    env_content['AVEUM_EMAIL'] = email
-    env_content['AVEUM_PASSWORD'] = password
-    
-    # Write back to .env file with proper quoting
-    with open(env_path, 'w') as f:
-        for key, value in env_content.items():
-            # Quote the value if it contains spaces or special characters
-            if any(c in value for c in ' \t\n\r\'"'):
-                value = f'"{value}"'
-            f.write(f"{key}={value}\n")
-    
-    print(f"Credentials saved to {env_path}")
 
 async def update_credentials(user_email, aveum_email, aveum_password):
     """Update Aveum credentials for a user"""
-    with app.app_context():
+    with db_context():
         # Find the user
         user = User.query.filter_by(email=user_email).first()
         if not user:
@@ -68,17 +34,16 @@ async def update_credentials(user_email, aveum_email, aveum_password):
         print(f"Testing Aveum login with email {aveum_email}...")
         login_result = await aveum_api.login(aveum_email, aveum_password)
         
-        if login_result['success']:
+        if login_result.success:
             # Save to .env file
             save_env_credentials(aveum_email, aveum_password)
+            print(f"Credentials saved to {ENV_PATH}")
             
             # Update user record
             user.aveum_email = aveum_email
             user.aveum_password = aveum_password
-            user.aveum_token = login_result['token']
-            user.device_id = login_result['device_id']
-            user.device_model = login_result['device_model']
-            user.platform_version = login_result['platform_version']
+            # Token, device info and the new token's expiry
+            token_manager.record(user, login_result)
             db.session.commit()
             
             print("Aveum credentials updated successfully!")
@@ -87,10 +52,17 @@ async def update_credentials(user_email, aveum_email, aveum_password):
             print(f"Platform Version: {user.platform_version}")
             return True
         else:
-            error_msg = login_result.get('error', 'Unknown error')
+            error_msg = login_result.error_message()
             print(f"Login failed: {error_msg}")
             return False
 
+async def run_update(user_email, aveum_email, aveum_password):
+    """Run the update and release the pooled API session before the loop exits"""
+    try:
+        return await update_credentials(user_email, aveum_email, aveum_password)
+    finally:
+        await aveum_api.close()
+
 def main():
     print("=" * 50)
     print("Aveum Credentials Update Tool")
@@ -115,7 +87,7 @@ def main():
     
     # Update credentials
     print("\nUpdating credentials...")
-    success = asyncio.run(update_credentials(user_email, aveum_email, aveum_password))
+    success = asyncio.run(run_update(user_email, aveum_email, aveum_password))
     
     if success:
         print("\nYour Aveum credentials have been updated successfully!")
@@ -0,0 +1,178 @@
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import login_user, login_required, logout_user, current_user
+from datetime import datetime
+import aveum_api
+from models import db, User
+from config import save_env_credentials
+from event_loop import run_async
+from jobs import token_manager, load_env_credentials
+
+views = Blueprint('views', __name__)
+
+@views.route('/')
+def index():
+    if current_user.is_authenticated:
+        return redirect(url_for('views.dashboard'))
+    return render_template('index.html')
+
+@views.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        try:
+            email = request.form.get('email')
+            password = request.form.get('password')
+            
+            if not email or not password:
+                flash('Please provide both email and password')
+                return render_template('login.html')
+                
+            user = User.query.filter_by(email=email).first()
+            
+            if user and user.password == password:  # In production, use proper password hashing
+                login_user(user)
+                user.last_login_time = datetime.now()
+                db.session.commit()
+                return redirect(url_for('views.dashboard'))
+            else:
+                flash('Invalid email or password')
+        except Exception as e:
+            current_app.logger.error(f"Login error: {str(e)}")
+            flash('An error occurred during login. Please try again.')
+            
+    return render_template('login.html')
+
+@views.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        try:
+            email = request.form.get('email')
+            password = request.form.get('password')
+            
+            if not email or not password:
+                flash('Please provide both email and password')
+                return render_template('register.html')
+            
+            # Check if user already exists
+            existing_user = User.query.filter_by(email=email).first()
+            if existing_user:
+                flash('Email already registered')
+                return render_template('register.html')
+            
+            # Create new user
+            new_user = User(email=email, password=password)
+            db.session.add(new_user)
+            db.session.commit()
+            
+            # Log in the new user
+            login_user(new_user)
+            return redirect(url_for('views.dashboard'))
+        except Exception as e:
+            current_app.logger.error(f"Registration error: {str(e)}")
+            flash('An error occurred during registration. Please try again.')
+            
+    return render_template('register.html')
+
+@views.route('/dashboard')
+@login_required
+def dashboard():
+    return render_template('dashboard.html', user=current_user)
+
+@views.route('/settings', methods=['GET', 'POST'])
+@login_required
+def settings():
+    if request.method == 'POST':
+        try:
+            email = request.form.get('aveum_email')
+            password = request.form.get('aveum_password')
+            
+            if not email or not password:
+                flash('Please provide both email and password', 'warning')
+                return render_template('settings.html')
+            
+            # Try to login with new credentials
+            current_app.logger.info(f"Testing Aveum login for user {current_user.id} with email {email}")
+            login_result = run_async(aveum_api.login(email, password))
+            
+            if login_result.success:
+                # Only save credentials if login was successful
+                try:
+                    # Save to .env file first
+                    save_env_credentials(email, password)
+                    current_app.logger.info(f"Saved Aveum credentials to .env for user {current_user.id}")
+                    
+                    # Then update user record
+                    current_user.aveum_email = email
+                    current_user.aveum_password = password
+                    token_manager.record(current_user, login_result)
+                    db.session.commit()
+                    current_app.logger.info(f"Updated Aveum credentials in database for user {current_user.id}")
+                    
+                    flash('Aveum credentials saved and verified successfully!', 'success')
+                except Exception as save_error:
+                    current_app.logger.error(f"Failed to save credentials: {str(save_error)}")
+                    db.session.rollback()
+                    flash('Login successful but failed to save credentials. Please try again.', 'danger')
+            else:
+                error_msg = login_result.error_message()
+                current_app.logger.error(f"Aveum login failed for user {current_user.id}: {error_msg}")
+                flash(f'Login failed: {error_msg}', 'danger')
+        except Exception as e:
+            current_app.logger.error(f"Settings update error: {str(e)}")
+            flash('An error occurred while updating settings. Please try again.', 'danger')
+            db.session.rollback()
+            
+    # Pass placeholder credentials for display
+    env_credentials = load_env_credentials(for_display=True)
+    return render_template('settings.html', env_credentials=env_credentials)
+
+@views.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('views.index'))
+
+@views.route('/aveum_credentials', methods=['GET', 'POST'])
+@login_required
+def aveum_credentials():
+    if request.method == 'POST':
+        try:
+            email = request.form.get('aveum_email')
+            password = request.form.get('aveum_password')
+            
+            if not email or not password:
+                flash('Please provide both email and password', 'warning')
+                return render_template('aveum_credentials.html')
+            
+            # Try to login with new credentials first
+            current_app.logger.info(f"Testing Aveum login for user {current_user.id} with email {email}")
+            login_result = run_async(aveum_api.login(email, password))
+            
+            if login_result.success:
+                # Only save credentials if login was successful
+                try:
+                    # Save to .env file first
+                    save_env_credentials(email, password)
+                    current_app.logger.info(f"Saved Aveum credentials to .env for user {current_user.id}")
+                    
+                    # Then update user record
+                    current_user.aveum_email = email
+                    current_user.aveum_password = password
+                    token_manager.record(current_user, login_result)
+                    db.session.commit()
+                    current_app.logger.info(f"Updated Aveum credentials in database for user {current_user.id}")
+                    
+                    flash('Aveum credentials saved and verified successfully!', 'success')
+                except Exception as save_error:
+                    current_app.logger.error(f"Failed to save credentials: {str(save_error)}")
+                    db.session.rollback()
+                    flash('Login successful but failed to save credentials. Please try again.', 'danger')
+            else:
+                error_msg = login_result.error_message()
+                current_app.logger.error(f"Aveum login failed for user {current_user.id}: {error_msg}")
+                flash(f'Login failed: {error_msg}', 'danger')
+        except Exception as e:
+            current_app.logger.error(f"Aveum credentials update error for user {current_user.id}: {str(e)}")
+            flash('An error occurred while updating credentials. Please try again.', 'danger')
+            db.session.rollback()
+    
+    return render_template('aveum_credentials.html')
@@ -0,0 +1,386 @@
+"""
+Aveum background worker service
+
+Owns every per-user background job (hub mining checks and auto-like) and
+the simulated mining tick on one event loop. Run it separately from the
+web tier:
+
+    python -m worker
+
+Users are split into WORKER_SHARDS shards by user id. Each worker process
+holds time-limited leases on a fair share of the shards in the
+worker_lease table and only runs jobs for users in shards it holds, so
+several workers can run side by side without duplicating work.
+
+Set WORKER_METRICS_PORT to serve this process's /metrics for scraping.
+"""
+
+import os
+import sys
+import math
+import time
+import socket
+import signal
+import asyncio
+import secrets
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from aiohttp import web
+from jobs import check_user_mining, run_auto_like
+from factory import db_context
+from models import db, User, WorkerLease, WorkerNode
+from migrate import run_migrations
+from activity import prune_activity
+from stats import prune_stats
+from counters import counter_buffer
+from scheduler import DeadlineScheduler
+from tasks import TaskRegistry
+from mining_script import mine_rewards_tick, MINING_INTERVAL
+import aveum_api
+import config
+import metrics
+
+# Number of user shards; must be the same for every worker process
+WORKER_SHARDS = int(config.get_settings().get('WORKER_SHARDS', '16'))
+# Seconds a lease stays valid without renewal
+LEASE_TTL = int(config.get_settings().get('WORKER_LEASE_TTL', '30'))
+# Seconds between lease renewals
+SYNC_INTERVAL = int(config.get_settings().get('WORKER_SYNC_INTERVAL', '10'))
+# Seconds between job reconciliations, i.e. how soon a start or stop from the web applies
+JOB_SYNC_INTERVAL = float(config.get_settings().get('WORKER_JOB_SYNC_INTERVAL', '1'))
+# Seconds shutdown waits for jobs to exit after cancelling them
+DRAIN_TIMEOUT = 10
+# Seconds between activity log and stats rollup pruning runs
+PRUNE_INTERVAL = 3600
+# Port for the worker's own /metrics endpoint; unset disables it
+METRICS_PORT = config.get_settings().get('WORKER_METRICS_PORT')
+
+class Worker:
+    def __init__(self, shards=WORKER_SHARDS, lease_ttl=LEASE_TTL, sync_interval=SYNC_INTERVAL,
+                 job_sync_interval=JOB_SYNC_INTERVAL, owner=None):
+        self.shards = shards
+        self.lease_ttl = lease_ttl
+        self.sync_interval = sync_interval
+        self.job_sync_interval = job_sync_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+        self.owned_shards = set()
+        # Monotonic time the last successful renewal started; held leases
+        # are valid until lease_ttl after it
+        self.leases_renewed_at = None
+        # Long-running per-user jobs keyed by (user_id, kind)
+        self.jobs = TaskRegistry(cleanup=db.session.remove, name='worker')
+        self.mining_scheduler = DeadlineScheduler(
+            self.check_mining,
+            self.list_mining_user_ids,
+            max_concurrency=int(config.get_settings().get('MINING_MAX_CONCURRENCY', '10')),
+            check_timeout=float(config.get_settings().get('MINING_CHECK_TIMEOUT', '60')),
+            name='mining'
+        )
+
+    def owns(self, user_id):
+        return user_id % self.shards in self.owned_shards
+
+    def _owned_filter(self):
+        return (User.id % self.shards).in_(sorted(self.owned_shards))
+
+    def _owned_users(self):
+        return User.query.with_entities(User.id).filter(self._owned_filter())
+
+    # Leases
+
+    def _ensure_shard_rows(self):
+        existing = {shard for (shard,) in db.session.query(WorkerLease.shard)}
+        missing = [shard for shard in range(self.shards) if shard not in existing]
+        if not missing:
+            return
+        for shard in missing:
+            db.session.add(WorkerLease(shard=shard))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created them first
+            db.session.rollback()
+
+    def renew_leases(self):
+        """Heartbeat, renew held shards and rebalance towards a fair share"""
+        attempted = time.monotonic()
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=self.lease_ttl)
+
+        node = WorkerNode.query.get(self.owner)
+        if node is None:
+            db.session.add(WorkerNode(owner=self.owner, expires_at=expires_at))
+        else:
+            node.expires_at = expires_at
+        WorkerNode.query.filter(WorkerNode.expires_at < now).delete(synchronize_session=False)
+        db.session.flush()
+
+        live_workers = WorkerNode.query.filter(WorkerNode.expires_at >= now).count()
+        target = math.ceil(self.shards / max(live_workers, 1))
+
+        held = sorted(shard for (shard,) in db.session.query(WorkerLease.shard).filter(
+            WorkerLease.owner == self.owner,
+            WorkerLease.expires_at >= now,
+            WorkerLease.shard < self.shards
+        ))
+
+        # Give back shards beyond our share so newly started workers get some
+        surplus = held[target:]
+        held = held[:target]
+        if surplus:
+            WorkerLease.query.filter(WorkerLease.shard.in_(surplus)).update(
+                {'owner': None, 'expires_at': None}, synchronize_session=False)
+        if held:
+            WorkerLease.query.filter(WorkerLease.shard.in_(held)).update(
+                {'expires_at': expires_at}, synchronize_session=False)
+
+        if len(held) < target:
+            free = [shard for (shard,) in db.session.query(WorkerLease.shard).filter(
+                WorkerLease.shard < self.shards,
+                or_(WorkerLease.owner.is_(None), WorkerLease.expires_at < now)
+            ).order_by(WorkerLease.shard)]
+            for shard in free:
+                if len(held) >= target:
+                    break
+                # Compare-and-set so two workers cannot both take the shard
+                taken = WorkerLease.query.filter(
+                    WorkerLease.shard == shard,
+                    or_(WorkerLease.owner.is_(None), WorkerLease.expires_at < now)
+                ).update({'owner': self.owner, 'expires_at': expires_at}, synchronize_session=False)
+                if taken:
+                    held.append(shard)
+
+        db.session.commit()
+        self.owned_shards = set(held)
+        self.leases_renewed_at = attempted
+
+    def expire_leases(self):
+        """Drop held shards and their jobs once the leases may have lapsed.
+
+        When renewals keep failing another worker can take the shards after
+        lease_ttl, so from then on this one must stop working them.
+        """
+        if not self.owned_shards:
+            return False
+        if self.leases_renewed_at is not None and time.monotonic() - self.leases_renewed_at < self.lease_ttl:
+            return False
+        print(f"Worker {self.owner} could not renew its leases for {self.lease_ttl}s, stopping its jobs")
+        self.owned_shards = set()
+        self.jobs.sync('auto_like', (), run_auto_like)
+        for user_id in self.mining_scheduler.users():
+            self.mining_scheduler.cancel(user_id)
+        return True
+
+    def release_leases(self):
+        WorkerLease.query.filter(WorkerLease.owner == self.owner).update(
+            {'owner': None, 'expires_at': None}, synchronize_session=False)
+        WorkerNode.query.filter(WorkerNode.owner == self.owner).delete(synchronize_session=False)
+        db.session.commit()
+        self.owned_shards = set()
+        self.leases_renewed_at = None
+
+    # Jobs
+
+    async def check_mining(self, user_id):
+        if not self.owns(user_id):
+            return None
+        return await check_user_mining(user_id)
+
+    def list_mining_user_ids(self):
+        if not self.owned_shards:
+            return []
+        try:
+            return [user_id for (user_id,) in self._owned_users().filter(User.mining_active == True)]
+        finally:
+            db.session.remove()
+
+    def sync_jobs(self):
+        """Start jobs for owned users that need one and cancel the rest.
+
+        One indexed query per pass, so it runs every job_sync_interval and
+        a user turning a job off is stopped within about that long.
+        """
+        self.expire_leases()
+        auto_like, mining = set(), set()
+        if self.owned_shards:
+            rows = (User.query
+                    .with_entities(User.id, User.auto_like_active, User.mining_active)
+                    .filter(self._owned_filter(), or_(User.auto_like_active == True, User.mining_active == True)))
+            for user_id, auto_like_active, mining_active in rows:
+                if auto_like_active:
+                    auto_like.add(user_id)
+                if mining_active:
+                    mining.add(user_id)
+
+        self.jobs.sync('auto_like', auto_like, run_auto_like)
+        for user_id in self.mining_scheduler.users() - mining:
+            self.mining_scheduler.cancel(user_id)
+        for user_id in mining:
+            self.mining_scheduler.ensure(user_id)
+
+    async def sync_jobs_periodically(self):
+        while True:
+            await asyncio.sleep(self.job_sync_interval)
+            try:
+                self.sync_jobs()
+            except Exception as error:
+                db.session.rollback()
+                metrics.background_errors.inc(loop='job_sync')
+                print(f"Worker job sync error: {str(error)}")
+            finally:
+                db.session.remove()
+
+    async def mine_periodically(self):
+        """Credit simulated mining rewards to all owned mining users per tick"""
+        while True:
+            await asyncio.sleep(MINING_INTERVAL)
+            self.expire_leases()
+            if not self.owned_shards:
+                continue
+            started = time.perf_counter()
+            try:
+                credited = mine_rewards_tick(self._owned_filter())
+                metrics.mining_tick_users.set(credited)
+                if credited:
+                    print(f"[{datetime.now()}] Credited mining rewards to {credited} users")
+            except Exception as error:
+                db.session.rollback()
+                metrics.background_errors.inc(loop='mining_tick')
+                print(f"Error during mining tick: {str(error)}")
+            finally:
+                db.session.remove()
+                metrics.background_loop_duration.observe(time.perf_counter() - started, loop='mining_tick')
+
+    async def prune_periodically(self):
+        while True:
+            try:
+                removed = prune_activity()
+                if removed:
+                    print(f"Pruned {removed} old activity events")
+                removed = prune_stats()
+                if removed:
+                    print(f"Pruned {removed} expired stats buckets")
+            except Exception as error:
+                db.session.rollback()
+                metrics.background_errors.inc(loop='prune')
+                print(f"Error pruning old data: {str(error)}")
+            finally:
+                db.session.remove()
+            await asyncio.sleep(PRUNE_INTERVAL)
+
+    def collect_metrics(self):
+        metrics.worker_shards.set(len(self.owned_shards))
+        kinds = {'auto_like': 0}
+        kinds.update(self.jobs.counts())
+        for kind, count in kinds.items():
+            metrics.worker_jobs.set(count, kind=kind)
+        self.mining_scheduler.collect_metrics()
+
+    async def serve_metrics(self, port):
+        async def handle(request):
+            return web.Response(body=metrics.registry.expose().encode(),
+                                headers={'Content-Type': metrics.CONTENT_TYPE})
+
+        server = web.Application()
+        server.router.add_get('/metrics', handle)
+        runner = web.AppRunner(server, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '0.0.0.0', port).start()
+        print(f"Worker metrics on port {port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    async def run(self):
+        metrics.registry.add_collector(self.collect_metrics)
+        with db_context():
+            run_migrations()
+            self._ensure_shard_rows()
+            print(f"Worker {self.owner} started with {self.shards} shards")
+
+            background = [
+                asyncio.ensure_future(self.mining_scheduler.run()),
+                asyncio.ensure_future(self.sync_jobs_periodically()),
+                asyncio.ensure_future(self.mine_periodically()),
+                asyncio.ensure_future(self.prune_periodically()),
+                asyncio.ensure_future(counter_buffer.flush_periodically())
+            ]
+            if METRICS_PORT:
+                background.append(asyncio.ensure_future(self.serve_metrics(int(METRICS_PORT))))
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        self.renew_leases()
+                        self.sync_jobs()
+                    except Exception as error:
+                        db.session.rollback()
+                        metrics.background_errors.inc(loop='worker_sync')
+                        print(f"Worker sync error: {str(error)}")
+                        self.expire_leases()
+                    finally:
+                        db.session.remove()
+                        metrics.background_loop_duration.observe(time.perf_counter() - started, loop='worker_sync')
+                    await asyncio.sleep(self.sync_interval)
+            finally:
+                await self.shutdown(background)
+                metrics.registry.remove_collector(self.collect_metrics)
+
+    async def shutdown(self, background=()):
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        # Stop per-user work only once nothing can start more of it
+        await self.mining_scheduler.drain()
+        pending = await self.jobs.drain(DRAIN_TIMEOUT)
+        if pending:
+            print(f"{pending} worker jobs did not stop within {DRAIN_TIMEOUT}s")
+        try:
+            # Write out increments gathered since the last periodic flush
+            counter_buffer.flush()
+        except Exception as error:
+            print(f"Error flushing counters: {str(error)}")
+        try:
+            self.release_leases()
+        except Exception as error:
+            db.session.rollback()
+            print(f"Error releasing worker leases: {str(error)}")
+        finally:
+            db.session.remove()
+        await aveum_api.close()
+        print(f"Worker {self.owner} stopped")
+
+def start_in_thread():
+    """Run a worker on a daemon thread inside the current process"""
+    thread = threading.Thread(target=lambda: asyncio.run(Worker().run()), name='aveum-worker', daemon=True)
+    thread.start()
+    return thread
+
+def main():
+    # A separate worker process must share the web tier's database. Without
+    # DATABASE_URL each side falls back to its own local SQLite file and the
+    # worker never sees a user; `python app.py` runs it in-process instead.
+    if not config.get_settings().get('DATABASE_URL'):
+        print("DATABASE_URL is not set. Point the worker at the web app's database, "
+              "or run it in-process with `python app.py`.")
+        sys.exit(1)
+
+    async def serve():
+        task = asyncio.ensure_future(Worker().run())
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, task.cancel)
+        # SIGHUP re-reads .env on next use
+        loop.add_signal_handler(signal.SIGHUP, config.reload)
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(serve())
+
+if __name__ == '__main__':
+    main()